@@ -0,0 +1,107 @@
+"""
+Follow graph adjacency sets kept in Redis.
+
+Each user's followed ids and follower ids are Redis sets, built from
+``Follow`` the first time they are needed and kept current by
+``follow_added``/``follow_removed``. Writes skip sets that are not built, so a
+built set is always complete. "Is following" checks on a page of users are
+then one SMISMEMBER and mutual-follower counts one SINTERCARD. Sets of users
+nobody asks about expire after ``ADJACENCY_TTL``; without Redis the same
+answers come from ``Follow`` indexes.
+"""
+from crowdbank.redis_client import get_redis
+from .models import Follow
+
+ADJACENCY_TTL = 60 * 60 * 24 * 7
+BUILD_BATCH_SIZE = 1000
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+# KEYS[1] set, KEYS[2] built marker; ARGV[1] 'sadd' or 'srem', ARGV[2] member
+_UPDATE_SCRIPT = """
+if redis.call('exists', KEYS[2]) == 0 then
+    return 0
+end
+redis.call(ARGV[1], KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def _key(user_id: int, direction: str) -> str:
+    return f'users:{direction}:{user_id}'
+
+
+def _built_key(user_id: int, direction: str) -> str:
+    return f'users:{direction}:{user_id}:built'
+
+
+def _neighbours(user_id: int, direction: str):
+    if direction == FOLLOWING:
+        return Follow.objects.filter(follower_id=user_id).values_list('following_id', flat=True)
+    return Follow.objects.filter(following_id=user_id).values_list('follower_id', flat=True)
+
+
+def _ensure(client, user_id: int, direction: str) -> None:
+    if client.exists(_built_key(user_id, direction)):
+        pipe = client.pipeline(transaction=False)
+        pipe.expire(_key(user_id, direction), ADJACENCY_TTL)
+        pipe.expire(_built_key(user_id, direction), ADJACENCY_TTL)
+        pipe.execute()
+        return
+    pipe = client.pipeline()
+    pipe.delete(_key(user_id, direction))
+    batch = []
+    for neighbour_id in _neighbours(user_id, direction).iterator(chunk_size=BUILD_BATCH_SIZE):
+        batch.append(neighbour_id)
+        if len(batch) >= BUILD_BATCH_SIZE:
+            pipe.sadd(_key(user_id, direction), *batch)
+            batch = []
+    if batch:
+        pipe.sadd(_key(user_id, direction), *batch)
+    pipe.expire(_key(user_id, direction), ADJACENCY_TTL)
+    pipe.set(_built_key(user_id, direction), 1, ex=ADJACENCY_TTL)
+    pipe.execute()
+
+
+def _update(command: str, follower_id: int, following_id: int) -> None:
+    client = get_redis()
+    if client is None:
+        return
+    script = client.register_script(_UPDATE_SCRIPT)
+    pipe = client.pipeline(transaction=False)
+    for user_id, direction, member in ((follower_id, FOLLOWING, following_id), (following_id, FOLLOWERS, follower_id)):
+        script(keys=[_key(user_id, direction), _built_key(user_id, direction)], args=[command, member], client=pipe)
+    pipe.execute()
+
+
+def follow_added(follower_id: int, following_id: int) -> None:
+    _update('sadd', follower_id, following_id)
+
+
+def follow_removed(follower_id: int, following_id: int) -> None:
+    _update('srem', follower_id, following_id)
+
+
+def following_among(user_id: int, user_ids) -> set:
+    """The subset of ``user_ids`` that ``user_id`` follows."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+    client = get_redis()
+    if client is None:
+        return set(_neighbours(user_id, FOLLOWING).filter(following_id__in=user_ids))
+    _ensure(client, user_id, FOLLOWING)
+    flags = client.smismember(_key(user_id, FOLLOWING), user_ids)
+    return {member for member, flag in zip(user_ids, flags) if flag}
+
+
+def mutual_followers_count(viewer_id: int, user_id: int) -> int:
+    """How many of the users ``viewer_id`` follows also follow ``user_id``."""
+    client = get_redis()
+    if client is None:
+        return _neighbours(user_id, FOLLOWERS).filter(
+            follower_id__in=_neighbours(viewer_id, FOLLOWING)
+        ).count()
+    _ensure(client, viewer_id, FOLLOWING)
+    _ensure(client, user_id, FOLLOWERS)
+    return client.sintercard(2, [_key(viewer_id, FOLLOWING), _key(user_id, FOLLOWERS)])
@@ -0,0 +1,241 @@
+"""
+Reputation leaderboards kept in Redis sorted sets.
+
+The global board ranks users by ``UserStats.reputation``. Each idea category
+has its own board, scored by likes received on the user's ideas in that
+category plus comments the user wrote on ideas in it. ``bump_stats`` forwards
+every reputation change here after commit, so ranks move with follows, likes
+and comments, and a page of a board or one user's rank costs a ZREVRANGE or
+ZREVRANK. ``rebuild_leaderboard`` recomputes every board from the database and
+swaps it in; until it has run (and without Redis) boards are ranked by the
+database instead. While a rebuild runs, changes are also appended to a replay
+list and applied again once the rebuilt boards are in place, so increments
+that missed the rebuild's snapshot are not lost.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.ideas.models import Comment, IdeaLike
+from crowdbank.ranking import RankedSequence
+from crowdbank.redis_client import get_redis
+from .models import User, UserStats
+
+READY_KEY = 'users:leaderboard:ready'
+CATEGORIES_KEY = 'users:leaderboard:categories'
+REBUILDING_KEY = 'users:leaderboard:rebuilding'
+REPLAY_KEY = 'users:leaderboard:replay'
+# Bounds how long a crashed rebuild keeps changes queued for replay.
+REBUILD_TIMEOUT = 60 * 60
+
+# KEYS[1] ready, KEYS[2] rebuilding, KEYS[3] replay list, KEYS[4] categories;
+# ARGV: (board key, user id, delta, category or '')...
+_APPLY_SCRIPT = """
+local ready = redis.call('exists', KEYS[1]) == 1
+local rebuilding = redis.call('exists', KEYS[2]) == 1
+for i = 1, #ARGV, 4 do
+    if ready then
+        redis.call('zincrby', ARGV[i], ARGV[i + 2], ARGV[i + 1])
+        redis.call('zremrangebyscore', ARGV[i], '-inf', 0)
+        if ARGV[i + 3] ~= '' then
+            redis.call('sadd', KEYS[4], ARGV[i + 3])
+        end
+    end
+    if rebuilding then
+        redis.call('rpush', KEYS[3], ARGV[i], ARGV[i + 1], ARGV[i + 2], ARGV[i + 3])
+    end
+end
+return 1
+"""
+
+
+def _key(category=None) -> str:
+    return f'users:leaderboard:category:{category}' if category else 'users:leaderboard'
+
+
+def _apply(changes) -> None:
+    """Apply ``(category, user_id, delta)`` changes after commit; members that drop to zero leave the board."""
+    changes = [change for change in changes if change[2]]
+    client = get_redis()
+    if client is None or not changes:
+        return
+
+    args = []
+    for category, user_id, delta in changes:
+        args.extend((_key(category), user_id, delta, category or ''))
+
+    def apply():
+        client.register_script(_APPLY_SCRIPT)(keys=[READY_KEY, REBUILDING_KEY, REPLAY_KEY, CATEGORIES_KEY], args=args)
+
+    transaction.on_commit(apply)
+
+
+def reputation_changed(user_id: int, delta: int, category: str = None) -> None:
+    """Move ``user_id`` on the global board and, for likes and comments, on ``category``'s board."""
+    _apply([(None, user_id, delta)] + ([(category, user_id, delta)] if category else []))
+
+
+def idea_category_changed(idea, old_category: str) -> None:
+    """Move the likes and comments of ``idea`` from ``old_category``'s board to its current one."""
+    if old_category == idea.category:
+        return
+    counts = dict(
+        Comment.objects.filter(idea_id=idea.pk)
+        .values('author_id')
+        .annotate(total=Count('pk'))
+        .values_list('author_id', 'total')
+    )
+    counts[idea.author_id] = counts.get(idea.author_id, 0) + IdeaLike.objects.filter(idea_id=idea.pk).count()
+    _apply(
+        [(old_category, user_id, -total) for user_id, total in counts.items()]
+        + [(idea.category, user_id, total) for user_id, total in counts.items()]
+    )
+
+
+def _category_scores(category: str):
+    likes = (
+        IdeaLike.objects.filter(idea__author=OuterRef('pk'), idea__category=category)
+        .order_by()
+        .values('idea__author')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    comments = (
+        Comment.objects.filter(author=OuterRef('pk'), idea__category=category)
+        .order_by()
+        .values('author')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(likes), 0) + Coalesce(Subquery(comments), 0)
+
+
+def ranked_queryset(category: str = None):
+    """Database ranking used without Redis: users with a positive ``score``, best first."""
+    if category:
+        queryset = User.objects.annotate(score=_category_scores(category))
+    else:
+        queryset = User.objects.annotate(score=F('stats__reputation'))
+    return queryset.filter(score__gt=0).order_by('-score', 'pk')
+
+
+class RankedUsers(RankedSequence):
+    """Users ranked on a leaderboard, each with its board ``score``."""
+    with_scores = True
+
+    def hydrate(self, row, score):
+        row.score = int(score)
+        return row
+
+
+def get_ranked_users(category: str = None, queryset=None):
+    """Return a ``RankedUsers`` for the board or ``None`` when the boards are not built."""
+    client = get_redis()
+    if client is None or not client.exists(READY_KEY):
+        return None
+    return RankedUsers(client, _key(category), queryset if queryset is not None else User.objects.all())
+
+
+def get_rank(user_id: int, category: str = None) -> dict:
+    """``{'rank', 'score'}`` of one user; ``rank`` is ``None`` for users without a positive score."""
+    client = get_redis()
+    if client is not None and client.exists(READY_KEY):
+        pipe = client.pipeline(transaction=False)
+        pipe.zrevrank(_key(category), user_id)
+        pipe.zscore(_key(category), user_id)
+        rank, score = pipe.execute()
+        if rank is None:
+            return {'rank': None, 'score': 0}
+        return {'rank': rank + 1, 'score': int(score)}
+    queryset = ranked_queryset(category)
+    score = queryset.filter(pk=user_id).values_list('score', flat=True).first()
+    if score is None:
+        return {'rank': None, 'score': 0}
+    ahead = queryset.filter(Q(score__gt=score) | Q(score=score, pk__lt=user_id)).count()
+    return {'rank': ahead + 1, 'score': score}
+
+
+def _board_scores(batch_size: int) -> dict:
+    boards = {None: {}}
+    for user_id, reputation in UserStats.objects.filter(reputation__gt=0).values_list('user_id', 'reputation').iterator(
+        chunk_size=batch_size
+    ):
+        boards[None][user_id] = reputation
+    category_rows = (
+        IdeaLike.objects.values_list('idea__author_id', 'idea__category').annotate(total=Count('pk')).order_by(),
+        Comment.objects.values_list('author_id', 'idea__category').annotate(total=Count('pk')).order_by(),
+    )
+    for rows in category_rows:
+        for user_id, category, total in rows.iterator(chunk_size=batch_size):
+            if not category:
+                continue
+            board = boards.setdefault(category, {})
+            board[user_id] = board.get(user_id, 0) + total
+    return boards
+
+
+def _replay(client) -> None:
+    """Apply the changes recorded during a rebuild to the boards that replaced the live ones."""
+    entries = [entry.decode() if isinstance(entry, bytes) else entry for entry in client.lrange(REPLAY_KEY, 0, -1)]
+    pipe = client.pipeline()
+    for start in range(0, len(entries), 4):
+        key, user_id, delta, category = entries[start:start + 4]
+        pipe.zincrby(key, int(delta), user_id)
+        pipe.zremrangebyscore(key, '-inf', 0)
+        if category:
+            pipe.sadd(CATEGORIES_KEY, category)
+    pipe.delete(REPLAY_KEY)
+    pipe.execute()
+
+
+def rebuild_leaderboard(batch_size: int = 1000) -> dict:
+    """
+    Recompute every board from the database and swap it in atomically. Returns sizes per board.
+
+    Changes committed while the boards are read are recorded from the moment
+    the rebuild starts and replayed after the swap. The reads share one
+    snapshot, so only a write committed in the instant before that snapshot
+    is taken can be counted twice (until the next rebuild).
+    """
+    client = get_redis()
+    if client is None:
+        return {}
+    pipe = client.pipeline()
+    pipe.delete(REPLAY_KEY)
+    pipe.set(REBUILDING_KEY, 1, ex=REBUILD_TIMEOUT)
+    pipe.execute()
+    # One REPEATABLE READ transaction gives every board the same snapshot (not possible inside an outer one).
+    own_transaction = not connection.in_atomic_block
+    with transaction.atomic():
+        if own_transaction and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        boards = _board_scores(batch_size)
+
+    old_categories = {
+        category.decode() if isinstance(category, bytes) else category for category in client.smembers(CATEGORIES_KEY)
+    }
+    categories = [category for category in boards if category]
+    for category, scores in boards.items():
+        staging_key = f'{_key(category)}:staging'
+        client.delete(staging_key)
+        members = list(scores.items())
+        for start in range(0, len(members), batch_size):
+            client.zadd(staging_key, dict(members[start:start + batch_size]))
+    pipe = client.pipeline()
+    for category, scores in boards.items():
+        if scores:
+            pipe.rename(f'{_key(category)}:staging', _key(category))
+        else:
+            pipe.delete(_key(category))
+    for category in old_categories - set(categories):
+        pipe.delete(_key(category))
+    pipe.delete(CATEGORIES_KEY)
+    if categories:
+        pipe.sadd(CATEGORIES_KEY, *categories)
+    pipe.set(READY_KEY, 1)
+    # Changes applied from here on go to the new boards directly, so the replay list is complete.
+    pipe.delete(REBUILDING_KEY)
+    pipe.execute()
+    _replay(client)
+    return {category or 'global': len(scores) for category, scores in boards.items()}
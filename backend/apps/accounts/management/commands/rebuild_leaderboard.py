@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.leaderboard import rebuild_leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the Redis reputation leaderboards (global and per category). Run nightly from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        sizes = rebuild_leaderboard(batch_size=options['batch_size'])
+        if not sizes:
+            self.stdout.write(self.style.WARNING('Redis is not configured; leaderboards are served from the database.'))
+            return
+        for board, size in sizes.items():
+            self.stdout.write(self.style.SUCCESS(f'{board}: {size} user(s) ranked.'))
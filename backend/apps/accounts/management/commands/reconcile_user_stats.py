@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.accounts.stats import reconcile_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount stored follower/idea/like/comment counters on users and fix any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = reconcile_user_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled stats on {fixed} user(s).'))
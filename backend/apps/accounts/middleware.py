@@ -1,5 +1,4 @@
-from django.core.cache import cache
-from django.utils import timezone
+from .presence import mark_online
 
 
 class PresenceMiddleware:
@@ -10,6 +9,5 @@ class PresenceMiddleware:
         response = self.get_response(request)
         user = getattr(request, "user", None)
         if user and user.is_authenticated:
-            cache.set(f"user:presence:{user.id}", True, timeout=90)
-            cache.set(f"user:last_seen:{user.id}", timezone.now().isoformat(), timeout=60 * 60 * 24)
+            mark_online(user.id)
         return response
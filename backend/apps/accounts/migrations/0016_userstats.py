@@ -0,0 +1,74 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:05
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, field):
+    return Coalesce(
+        models.Subquery(
+            queryset.filter(**{field: models.OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=models.Count('id'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def backfill_stats(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    UserStats = apps.get_model('accounts', 'UserStats')
+    Follow = apps.get_model('accounts', 'Follow')
+    Idea = apps.get_model('ideas', 'Idea')
+    IdeaLike = apps.get_model('ideas', 'IdeaLike')
+    Comment = apps.get_model('ideas', 'Comment')
+    users = User.objects.annotate(
+        n_followers=_count(Follow.objects, 'following'),
+        n_following=_count(Follow.objects, 'follower'),
+        n_ideas=_count(Idea.objects, 'author'),
+        n_likes=_count(IdeaLike.objects, 'idea__author'),
+        n_comments=_count(Comment.objects, 'author'),
+    ).values_list('pk', 'n_followers', 'n_following', 'n_ideas', 'n_likes', 'n_comments')
+    UserStats.objects.bulk_create(
+        [
+            UserStats(
+                user_id=pk,
+                followers_count=followers,
+                following_count=following,
+                total_ideas=ideas,
+                total_likes_received=likes,
+                comments_count=comments,
+            )
+            for pk, followers, following, ideas, likes, comments in users.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_user_avatar_variants'),
+        ('ideas', '0018_relatedidea'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers_count', models.PositiveIntegerField(default=0)),
+                ('following_count', models.PositiveIntegerField(default=0)),
+                ('total_ideas', models.PositiveIntegerField(default=0)),
+                ('total_likes_received', models.PositiveIntegerField(default=0)),
+                ('comments_count', models.PositiveIntegerField(default=0)),
+                ('reputation', models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('followers_count'), '+', models.F('total_likes_received')), '+', models.F('comments_count')), output_field=models.IntegerField())),
+            ],
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
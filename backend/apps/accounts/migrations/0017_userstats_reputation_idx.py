@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_userstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userstats',
+            index=models.Index(fields=['-reputation', 'user'], name='userstats_reputation_idx'),
+        ),
+    ]
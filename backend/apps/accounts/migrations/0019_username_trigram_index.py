@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:16
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_follow_list_indexes'),
+    ]
+
+    # Expression index matching UPPER(username) in icontains and trigram lookups; not declared on the model.
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            'CREATE INDEX accounts_user_username_trgm ON accounts_user USING gin (UPPER(username) gin_trgm_ops);',
+            'DROP INDEX accounts_user_username_trgm;',
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
 
 
 class User(AbstractUser):
@@ -7,6 +8,7 @@ class User(AbstractUser):
     bio = models.TextField(blank=True)
     avatar_url = models.URLField(blank=True)
     avatar_file = models.FileField(upload_to='avatars/', blank=True, null=True)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     birth_date = models.DateField(null=True, blank=True)
     phone = models.CharField(max_length=30, blank=True)
     location = models.CharField(max_length=255, blank=True)
@@ -26,6 +28,33 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('follower', 'following')
+        indexes = [
+            models.Index(fields=['following', '-created_at', '-id'], name='follow_followers_idx'),
+            models.Index(fields=['follower', '-created_at', '-id'], name='follow_following_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    """Stored profile counters, kept in step by ``apps.accounts.stats``"""
+    user = models.OneToOneField('User', on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    total_ideas = models.PositiveIntegerField(default=0)
+    total_likes_received = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    reputation = models.GeneratedField(
+        expression=F('followers_count') + F('total_likes_received') + F('comments_count'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-reputation', 'user'], name='userstats_reputation_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'Stats for user {self.user_id}'
 
 
 class PasswordResetOTP(models.Model):
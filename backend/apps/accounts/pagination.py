@@ -0,0 +1,6 @@
+from apps.ideas.pagination import KeysetPagination
+
+
+class FollowPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+    page_size = 50
@@ -0,0 +1,130 @@
+"""
+Write-coalesced user presence.
+
+Presence is two Redis keys per user: ``presence:online:{id}``, which expires
+``ONLINE_TTL`` seconds after the last recorded activity, and
+``presence:last_seen:{id}``. HTTP requests and WebSocket frames report
+activity constantly, but it is written at most once per ``WRITE_INTERVAL``
+per user and process; reports inside the interval return without a round
+trip, and each write sends both keys in one pipeline. Records of writes older
+than the interval are dropped as new writes come in, so the per-process map
+only holds users active in the last ``WRITE_INTERVAL``. Going offline is always
+written. Consumers call the ``a``-prefixed coroutines, which use a
+``redis.asyncio`` client instead of blocking the event loop. Without Redis the
+keys live in the Django cache.
+"""
+import asyncio
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from crowdbank.redis_client import get_redis
+
+ONLINE_TTL = 90
+LAST_SEEN_TTL = 60 * 60 * 24
+WRITE_INTERVAL = 30
+
+# user id -> (monotonic time, online) of this process's last write, oldest first
+_last_write: 'OrderedDict[int, tuple[float, bool]]' = OrderedDict()
+_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _online_key(user_id: int) -> str:
+    return f'presence:online:{user_id}'
+
+
+def _last_seen_key(user_id: int) -> str:
+    return f'presence:last_seen:{user_id}'
+
+
+def _due(user_id: int, online: bool) -> bool:
+    """Whether this report must be written; records it as written if so."""
+    now = time.monotonic()
+    with _lock:
+        previous = _last_write.get(user_id)
+        if online and previous is not None and previous[1] and now - previous[0] < WRITE_INTERVAL:
+            return False
+        _last_write[user_id] = (now, online)
+        _last_write.move_to_end(user_id)
+        # A record older than the interval suppresses nothing; a missing one means the same.
+        while now - next(iter(_last_write.values()))[0] >= WRITE_INTERVAL:
+            _last_write.popitem(last=False)
+            if not _last_write:
+                break
+    return True
+
+
+def _queue(pipe, user_id: int, online: bool) -> None:
+    if online:
+        pipe.set(_online_key(user_id), 1, ex=ONLINE_TTL)
+    else:
+        pipe.delete(_online_key(user_id))
+    pipe.set(_last_seen_key(user_id), timezone.now().isoformat(), ex=LAST_SEEN_TTL)
+
+
+def _write(user_id: int, online: bool) -> None:
+    client = get_redis()
+    if client is None:
+        cache.set(_online_key(user_id), online, timeout=ONLINE_TTL)
+        cache.set(_last_seen_key(user_id), timezone.now().isoformat(), timeout=LAST_SEEN_TTL)
+        return
+    pipe = client.pipeline(transaction=False)
+    _queue(pipe, user_id, online)
+    pipe.execute()
+
+
+def mark_online(user_id: int) -> None:
+    if _due(user_id, True):
+        _write(user_id, True)
+
+
+def mark_offline(user_id: int) -> None:
+    _due(user_id, False)
+    _write(user_id, False)
+
+
+def _async_client():
+    # redis.asyncio connections belong to the event loop that opened them.
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = aioredis.Redis.from_url(settings.REDIS_URL)
+    return _async_clients[loop]
+
+
+async def _awrite(user_id: int, online: bool) -> None:
+    if get_redis() is None:
+        await sync_to_async(_write)(user_id, online)
+        return
+    pipe = _async_client().pipeline(transaction=False)
+    _queue(pipe, user_id, online)
+    await pipe.execute()
+
+
+async def amark_online(user_id: int) -> None:
+    if _due(user_id, True):
+        await _awrite(user_id, True)
+
+
+async def amark_offline(user_id: int) -> None:
+    _due(user_id, False)
+    await _awrite(user_id, False)
+
+
+def get_presence(user_id: int) -> dict:
+    """``{'is_online', 'last_seen'}`` of a user; ``last_seen`` is an ISO timestamp or ``None``."""
+    client = get_redis()
+    if client is None:
+        online, last_seen = cache.get(_online_key(user_id)), cache.get(_last_seen_key(user_id))
+    else:
+        online, last_seen = client.mget([_online_key(user_id), _last_seen_key(user_id)])
+        if isinstance(last_seen, bytes):
+            last_seen = last_seen.decode()
+    return {'is_online': bool(online), 'last_seen': last_seen}
@@ -4,6 +4,8 @@ from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from rest_framework import serializers
 
+from crowdbank.images import variant_urls
+
 User = get_user_model()
 
 def resolve_avatar_url(obj, request):
@@ -27,6 +29,15 @@ def resolve_avatar_url(obj, request):
     return None
 
 
+def resolve_avatar_variants(obj, request):
+    """``srcset`` map of the uploaded avatar; empty while an external ``avatar_url`` takes precedence."""
+    if not obj.avatar_file or not obj.avatar_variants:
+        return {}
+    if obj.avatar_url and urlparse(obj.avatar_url).path != obj.avatar_file.url:
+        return {}
+    return variant_urls(obj.avatar_variants, request)
+
+
 class UserSerializer(serializers.ModelSerializer):
     bio = serializers.CharField(max_length=500, required=False, allow_blank=True)
     avatar_url = serializers.URLField(required=False, allow_blank=True)
@@ -50,6 +61,7 @@ class UserSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
         data['avatar_url'] = resolve_avatar_url(instance, self.context.get('request'))
+        data['avatar_variants'] = resolve_avatar_variants(instance, self.context.get('request'))
         return data
 
 
@@ -157,6 +169,33 @@ class UserProfileSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
         data['avatar_url'] = resolve_avatar_url(instance, self.context.get('request'))
+        data['avatar_variants'] = resolve_avatar_variants(instance, self.context.get('request'))
+        return data
+
+
+class UserAutocompleteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'avatar_url')
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['avatar_url'] = resolve_avatar_url(instance, self.context.get('request'))
+        return data
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    rank = serializers.IntegerField(read_only=True)
+    score = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ('rank', 'id', 'username', 'avatar_url', 'score')
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['avatar_url'] = resolve_avatar_url(instance, self.context.get('request'))
+        data['avatar_variants'] = resolve_avatar_variants(instance, self.context.get('request'))
         return data
 
 
@@ -0,0 +1,115 @@
+"""
+Stored per-user profile counters.
+
+``UserStats`` holds the follower, following, idea, likes-received and comment
+counts that profile reads used to aggregate over five joins; ``reputation`` is
+a generated column over them. Write paths shift the counters with
+``bump_stats``. A user without a row is counted from scratch on the first
+bump, and ``reconcile_user_stats`` repairs drift from writes that bypass the
+API (Django admin, deleted accounts).
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.ideas.models import Comment, Idea, IdeaLike
+from . import leaderboard
+from .models import Follow, User, UserStats
+
+REPUTATION_FIELDS = ('followers_count', 'total_likes_received', 'comments_count')
+STAT_FIELDS = ('followers_count', 'following_count', 'total_ideas', 'total_likes_received', 'comments_count')
+
+
+def _count(queryset, field: str):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def _actual_counts():
+    return {
+        'followers_count': _count(Follow.objects, 'following'),
+        'following_count': _count(Follow.objects, 'follower'),
+        'total_ideas': _count(Idea.objects, 'author'),
+        'total_likes_received': _count(IdeaLike.objects, 'idea__author'),
+        'comments_count': _count(Comment.objects, 'author'),
+    }
+
+
+def with_stats(queryset):
+    """Annotate the stored counters and ``reputation`` onto a ``User`` queryset (one LEFT JOIN)."""
+    columns = {field: Coalesce(F(f'stats__{field}'), 0) for field in STAT_FIELDS}
+    return queryset.annotate(**columns, reputation=Coalesce(F('stats__reputation'), 0))
+
+
+def refresh_user_stats(user_ids) -> int:
+    """Recount and store the counters of ``user_ids``. Returns the number of rows written."""
+    rows = [
+        UserStats(user_id=user['pk'], **{field: user[field] for field in STAT_FIELDS})
+        for user in User.objects.filter(pk__in=list(user_ids)).annotate(**_actual_counts()).values('pk', *STAT_FIELDS)
+    ]
+    UserStats.objects.bulk_create(rows, update_conflicts=True, unique_fields=['user'], update_fields=STAT_FIELDS)
+    return len(rows)
+
+
+def bump_stats(user_id: int, category: str = None, **deltas: int) -> None:
+    """
+    Atomically shift stored counters of a user, never below zero.
+
+    Reputation changes also move the user on the leaderboards; ``category`` is
+    the category of the idea a like or comment belongs to.
+    """
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()}
+    )
+    if not updated:
+        # The recount already includes the write being recorded.
+        refresh_user_stats([user_id])
+    leaderboard.reputation_changed(user_id, sum(deltas.get(field, 0) for field in REPUTATION_FIELDS), category)
+
+
+def idea_deleted(idea: Idea) -> None:
+    """Record the removal of ``idea`` with its likes and comments; call it in the deleting transaction, before the delete."""
+    comment_counts = dict(
+        Comment.objects.filter(idea_id=idea.pk)
+        .values('author_id')
+        .annotate(total=Count('pk'))
+        .values_list('author_id', 'total')
+    )
+    own_comments = comment_counts.pop(idea.author_id, 0)
+    for author_id, total in comment_counts.items():
+        bump_stats(author_id, idea.category, comments_count=-total)
+    likes = IdeaLike.objects.filter(idea_id=idea.pk).count()
+    bump_stats(idea.author_id, idea.category, total_ideas=-1, total_likes_received=-likes, comments_count=-own_comments)
+
+
+def reconcile_user_stats(batch_size: int = 1000) -> int:
+    """Recount the stored counters of every user and fix drifted or missing rows. Returns the number fixed."""
+    fixed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            User.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .annotate(**_actual_counts())
+            .values('pk', *STAT_FIELDS)[:batch_size]
+        )
+        if not batch:
+            return fixed
+        last_id = batch[-1]['pk']
+        stored = {
+            row['user_id']: row
+            for row in UserStats.objects.filter(user_id__in=[user['pk'] for user in batch]).values('user_id', *STAT_FIELDS)
+        }
+        drifted = [
+            user['pk'] for user in batch
+            if any(stored.get(user['pk'], {}).get(field) != user[field] for field in STAT_FIELDS)
+        ]
+        if drifted:
+            fixed += refresh_user_stats(drifted)
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from functools import partial
 import random
 
 from django.conf import settings
@@ -7,25 +8,36 @@ from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.core.mail import send_mail
-from django.core.cache import cache
-from django.db.models import BooleanField, Count, Exists, F, OuterRef, Value
-from django.db.models.functions import Coalesce
+from django.db.models import BooleanField, Exists, OuterRef, Value
 from django.utils import timezone
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import FormParser, MultiPartParser, JSONParser
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from apps.ideas import timeline
 from apps.ideas.models import Comment
 from apps.ideas.serializers import CommentSerializer
 from apps.notifications.models import Notification
+from crowdbank import versions
+from crowdbank.images import schedule_variants
+from crowdbank.search import SEARCH_LIMIT, trigram_search
+from crowdbank.versions import SHARED_TTL, conditional_response, shared_response
+from . import graph
+from .leaderboard import get_rank, get_ranked_users, ranked_queryset
 from .models import Follow, PasswordResetOTP
+from .pagination import FollowPagination
+from .presence import mark_offline
+from .stats import bump_stats, with_stats
 from .serializers import (
     AdminUserSerializer,
+    LeaderboardEntrySerializer,
     RegisterSerializer,
+    UserAutocompleteSerializer,
     UserMeSerializer,
     UserProfileSerializer,
     UserSerializer,
@@ -121,7 +133,7 @@ class LogoutView(APIView):
     def post(self, request):
         response = Response({'detail': 'Signed out.'}, status=status.HTTP_200_OK)
         if request.user and request.user.is_authenticated:
-            cache.set(f"user:presence:{request.user.id}", False, timeout=90)
+            mark_offline(request.user.id)
         clear_refresh_cookie(response)
         return response
 
@@ -226,13 +238,8 @@ class MeView(generics.RetrieveAPIView):
 
     def get_object(self):
         user_id = self.request.user.id
-        return User.objects.annotate(
-            followers_count=Coalesce(Count('followers', distinct=True), 0),
-            following_count=Coalesce(Count('following', distinct=True), 0),
-            total_ideas=Coalesce(Count('ideas', distinct=True), 0),
-            total_likes_received=Coalesce(Count('ideas__likes', distinct=True), 0),
+        return with_stats(User.objects.all()).annotate(
             is_following=Value(False, output_field=BooleanField()),
-            reputation=F('followers_count') + F('total_likes_received'),
         ).get(id=user_id)
 
     def get_serializer_context(self):
@@ -244,23 +251,14 @@ class MeView(generics.RetrieveAPIView):
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.AllowAny]
-    search_fields = ('username',)
+    # ?search= is ranked by trigram similarity in get_queryset, not SearchFilter.
 
     def get_queryset(self):
         user = self.request.user if self.request.user.is_authenticated else None
         search = self.request.query_params.get('search')
-        queryset = (
-            User.objects.all()
-            .annotate(
-                followers_count=Coalesce(Count('followers', distinct=True), 0),
-                following_count=Coalesce(Count('following', distinct=True), 0),
-                total_ideas=Coalesce(Count('ideas', distinct=True), 0),
-                total_likes_received=Coalesce(Count('ideas__likes', distinct=True), 0),
-                comments_count=Coalesce(Count('comments', distinct=True), 0),
-            )
-        )
+        queryset = with_stats(User.objects.all())
         if search:
-            queryset = queryset.filter(username__icontains=search)
+            queryset = trigram_search(queryset, 'username', search)
         if user:
             queryset = queryset.annotate(
                 is_following=Exists(
@@ -269,11 +267,19 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
             )
         else:
             queryset = queryset.annotate(is_following=Value(False, output_field=BooleanField()))
-        queryset = queryset.annotate(
-            reputation=F('followers_count') + F('total_likes_received') + F('comments_count')
-        )
         return queryset
 
+    def retrieve(self, request, *args, **kwargs):
+        scopes = [versions.scope('user', kwargs['pk'])]
+        return conditional_response(request, scopes, partial(self.render_profile, request, *args, **kwargs))
+
+    def render_profile(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        viewer_id, user_id = request.user.id, response.data['id']
+        if request.user.is_authenticated and viewer_id != user_id:
+            response.data['mutual_followers_count'] = graph.mutual_followers_count(viewer_id, user_id)
+        return response
+
     @action(
         detail=False,
         methods=['get', 'patch'],
@@ -285,19 +291,76 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
             serializer = UserUpdateSerializer(request.user, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
+            versions.bump(f'user:{request.user.id}', 'profiles')
+            if 'avatar_file' in serializer.validated_data:
+                schedule_variants(
+                    request.user, 'avatar_file', 'avatar_variants', scopes=(f'user:{request.user.id}', 'profiles')
+                )
         user = self.get_queryset().get(id=request.user.id)
         serializer = UserMeSerializer(user, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='autocomplete')
+    def autocomplete(self, request):
+        # Top matches only: no stats, follow flags or page count.
+        term = request.query_params.get('q', '').strip()
+        if not term:
+            return Response([])
+        users = User.objects.only('id', 'username', 'avatar_url', 'avatar_file')
+        users = trigram_search(users, 'username', term)[:SEARCH_LIMIT]
+        return Response(UserAutocompleteSerializer(users, many=True, context={'request': request}).data)
+
+    @action(detail=False, methods=['get'], url_path='leaderboard')
+    def leaderboard(self, request):
+        # Not conditional: ranks move with every follow, like and comment.
+        return shared_response(request, ['profiles'], partial(self.render_leaderboard, request), SHARED_TTL)
+
+    def render_leaderboard(self, request):
+        category = request.query_params.get('category') or None
+        ranked = get_ranked_users(category)
+        page = self.paginate_queryset(ranked if ranked is not None else ranked_queryset(category))
+        for rank, user in enumerate(page, start=self.paginator.page.start_index()):
+            user.rank = rank
+        serializer = LeaderboardEntrySerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='leaderboard/me',
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def leaderboard_me(self, request):
+        category = request.query_params.get('category') or None
+        return Response({'category': category, **get_rank(request.user.id, category)})
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def follow(self, request, pk=None):
         target = self.get_object()
         if target.id == request.user.id:
             return Response({'detail': 'You cannot follow yourself.'}, status=status.HTTP_400_BAD_REQUEST)
         follow, created = Follow.objects.get_or_create(follower=request.user, following=target)
+        # Bumped once the graph is updated, so a profile rendered in between is not stored under the
+        # new stamps. The viewer scope covers the mutual follower counts the follower sees on others.
+        scopes = (
+            versions.scope('user', request.user.id),
+            versions.scope('user', target.id),
+            versions.scope('viewer', request.user.id),
+        )
         if not created:
-            follow.delete()
+            # A concurrent unfollow may have removed the row already.
+            if Follow.objects.filter(pk=follow.pk).delete()[0]:
+                bump_stats(request.user.id, following_count=-1)
+                bump_stats(target.id, followers_count=-1)
+                graph.follow_removed(request.user.id, target.id)
+            timeline.follow_removed(request.user.id, target.id)
+            versions.bump(*scopes)
             return Response({'detail': 'Unfollowed.'}, status=status.HTTP_200_OK)
+        bump_stats(request.user.id, following_count=1)
+        bump_stats(target.id, followers_count=1)
+        graph.follow_added(request.user.id, target.id)
+        timeline.follow_added(request.user.id, target.id)
+        versions.bump(*scopes)
         Notification.objects.create(
             user=target,
             actor=request.user,
@@ -309,18 +372,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=['get'], url_path='comments')
     def comments(self, request, pk=None):
         target = self.get_object()
-        queryset = Comment.objects.select_related('author', 'idea').filter(author=target).annotate(
-            like_count=Coalesce(Count('likes', distinct=True), 0)
-        ).order_by('-created_at')
-
-        if request.user.is_authenticated:
-            from apps.ideas.models import CommentLike
-            queryset = queryset.annotate(
-                user_liked=Exists(CommentLike.objects.filter(comment=OuterRef('pk'), user=request.user))
-            )
-        else:
-            queryset = queryset.annotate(user_liked=Value(False, output_field=BooleanField()))
-
+        queryset = Comment.objects.select_related('author', 'idea').filter(author=target).order_by('-created_at')
         serializer = CommentSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -342,22 +394,35 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         if user.avatar_file:
             user.avatar_url = request.build_absolute_uri(user.avatar_file.url)
             user.save(update_fields=['avatar_url'])
+        versions.bump(f'user:{user.id}', 'profiles')
+        schedule_variants(user, 'avatar_file', 'avatar_variants', scopes=(f'user:{user.id}', 'profiles'))
 
         return Response({'avatar_url': user.avatar_url}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['get'], url_path='followers')
     def followers(self, request, pk=None):
-        target = self.get_object()
-        queryset = self.get_queryset().filter(following__following=target)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        target = get_object_or_404(User, pk=pk)
+        return self.render_follows(request, Follow.objects.filter(following=target), 'follower_id')
 
     @action(detail=True, methods=['get'], url_path='following')
     def following(self, request, pk=None):
-        target = self.get_object()
-        queryset = self.get_queryset().filter(followers__follower=target)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        target = get_object_or_404(User, pk=pk)
+        return self.render_follows(request, Follow.objects.filter(follower=target), 'following_id')
+
+    def render_follows(self, request, follows, user_field):
+        # Paged on the (user, -created_at) Follow indexes; profiles are hydrated for one page only.
+        paginator = FollowPagination()
+        page = paginator.paginate_queryset(follows.only('id', 'created_at', user_field), request, view=self)
+        user_ids = [getattr(follow, user_field) for follow in page]
+        users = with_stats(User.objects.filter(pk__in=user_ids)).in_bulk()
+        followed = graph.following_among(request.user.id, user_ids) if request.user.is_authenticated else set()
+        results = []
+        for user_id in user_ids:
+            if user_id in users:
+                users[user_id].is_following = user_id in followed
+                results.append(users[user_id])
+        serializer = self.get_serializer(results, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class AdminUserViewSet(viewsets.ModelViewSet):
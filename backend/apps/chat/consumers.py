@@ -5,21 +5,13 @@ from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 
+from apps.accounts import presence
 from .models import ChatRoom, Message, ChatRoomMembership
 
 User = get_user_model()
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
-    def _presence_key(self, user_id):
-        return f"user:presence:{user_id}"
-
-    def _last_seen_key(self, user_id):
-        return f"user:last_seen:{user_id}"
-
-    def _set_presence(self, user_id, is_online):
-        cache.set(self._presence_key(user_id), is_online, timeout=90)
-        cache.set(self._last_seen_key(user_id), timezone.now().isoformat(), timeout=60 * 60 * 24)
     def _base_url(self):
         headers = dict(self.scope.get("headers", []))
         host = headers.get(b"host", b"").decode()
@@ -63,7 +55,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
         await self.accept()
-        self._set_presence(self.user.id, True)
+        await presence.amark_online(self.user.id)
 
         # Mark messages as read
         await self.mark_messages_read()
@@ -74,13 +66,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
-        self._set_presence(self.user.id, False)
+        if self.user.is_authenticated:
+            await presence.amark_offline(self.user.id)
 
     async def receive(self, text_data):
         """Receive message from WebSocket"""
         data = json.loads(text_data)
         message_type = data.get('type', 'message')
-        self._set_presence(self.user.id, True)
+        await presence.amark_online(self.user.id)
 
         if message_type == 'message':
             body = data.get('body', '').strip()
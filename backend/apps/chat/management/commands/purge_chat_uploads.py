@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.chat.uploads import UPLOAD_TTL, purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete resumable chat uploads that were started but never sent, with their files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=int(UPLOAD_TTL.total_seconds() // 3600),
+            help='Only purge uploads older than this many hours.',
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_stale_uploads(timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} stale upload(s).'))
@@ -0,0 +1,154 @@
+"""
+Delivery of chat attachments with HTTP Range and conditional request support.
+
+``media_response`` answers ``If-None-Match``/``If-Modified-Since`` with 304
+and a single-range ``Range`` header (honouring ``If-Range``) with 206, so
+players can seek in voice messages and videos without downloading them.
+Stored files never change under the same name, so the ETag built from name,
+size and modification time is a strong validator.
+
+With ``MEDIA_ACCEL_REDIRECT`` set (production) the response carries only an
+``X-Accel-Redirect`` header; nginx serves the bytes, ranges and validators
+from an ``internal`` location and no Python worker streams the file.
+
+Attachments are never linked under ``MEDIA_URL``. ``attachment_url`` points
+at ``MessageMediaView`` with a ``token`` because ``<img>``, ``<audio>`` and
+``<video>`` cannot send the JWT header. The token is a timestamped signature
+of the requesting user's id for one message, kind and image variant; it
+expires after ``MEDIA_TOKEN_MAX_AGE`` and the view still checks that the user
+is a participant of the room, so a leaked URL stops working once they leave.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+MEDIA_MAX_AGE = 60 * 60 * 24
+MEDIA_TOKEN_MAX_AGE = 60 * 60 * 24
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _signer(message_id, kind: str, variant: str):
+    return signing.TimestampSigner(salt=f'chat-media:{message_id}:{kind}:{variant}')
+
+
+def attachment_url(request, message_id, kind: str, variant: str = '') -> str:
+    """
+    URL of one attachment (``variant`` is ``"<format>:<width>"`` of an image variant).
+
+    The URL carries a token for ``request.user``; without an authenticated
+    user it has none and the view requires the JWT header.
+    """
+    params = {'variant': variant} if variant else {}
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        params['token'] = _signer(message_id, kind, variant).sign(str(user.pk))
+    url = reverse('chat-message-media', args=[message_id, kind])
+    url = f'{url}?{urlencode(params)}' if params else url
+    return request.build_absolute_uri(url) if request else url
+
+
+def token_user_id(token, message_id, kind: str, variant: str = ''):
+    """Id of the user ``token`` was issued to, or ``None`` when it is missing, forged or expired."""
+    if not token:
+        return None
+    try:
+        return int(_signer(message_id, kind, variant).unsign(token, max_age=MEDIA_TOKEN_MAX_AGE))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def parse_range(header, size: int):
+    """
+    ``(start, end)`` requested by a single-range ``Range`` header.
+
+    Returns ``None`` when the whole file should be sent: no header, a syntax
+    we ignore (including multiple ranges) or a range covering everything.
+    Raises ``ValueError`` when the range cannot be satisfied.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(0, size - int(last)), size - 1
+    if start >= size or end < start:
+        raise ValueError('unsatisfiable range')
+    return start, end
+
+
+def _read_range(field_file, start: int, length: int):
+    with field_file.storage.open(field_file.name, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            data = handle.read(min(STREAM_CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _stream(request, field_file, content_type: str):
+    storage, name = field_file.storage, field_file.name
+    size = storage.size(name)
+    modified = int(storage.get_modified_time(name).timestamp())
+    etag = quote_etag(hashlib.md5(f'{name}|{size}|{modified}'.encode()).hexdigest())
+    not_modified = get_conditional_response(request, etag=etag, last_modified=modified)
+    if not_modified is not None:
+        return not_modified
+
+    byte_range = None
+    # A stale If-Range means the client's partial copy is outdated: send the whole file instead.
+    if request.headers.get('If-Range', etag) in (etag, http_date(modified)):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        _read_range(field_file, start, length),
+        status=206 if byte_range else 200,
+        content_type=content_type,
+    )
+    response['Content-Length'] = length
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified)
+    return response
+
+
+def media_response(request, field_file, download_name: str = None):
+    """Serve ``field_file`` to a caller that already passed the access check."""
+    content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+    accel_prefix = settings.MEDIA_ACCEL_REDIRECT
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{quote(field_file.name)}"
+    else:
+        response = _stream(request, field_file, content_type)
+        if response.status_code not in (200, 206):
+            return response
+    if download_name:
+        response['Content-Disposition'] = content_disposition_header(True, os.path.basename(download_name))
+    patch_cache_control(response, private=True, max_age=MEDIA_MAX_AGE)
+    return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0012_message_message_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='video',
+            field=models.FileField(blank=True, null=True, upload_to='chat-videos/'),
+        ),
+        migrations.AlterField(
+            model_name='call',
+            name='status',
+            field=models.CharField(choices=[('calling', 'Calling'), ('ringing', 'Ringing'), ('connecting', 'Connecting'), ('connected', 'Connected'), ('ended', 'Ended'), ('rejected', 'Rejected'), ('missed', 'Missed'), ('busy', 'Busy'), ('failed', 'Failed')], default='calling', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='message_type',
+            field=models.CharField(choices=[('text', 'Text'), ('image', 'Image'), ('video', 'Video'), ('audio', 'Audio'), ('file', 'File'), ('call', 'Call'), ('system', 'System')], default='text', max_length=20),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_username_trigram_index'),
+        ('chat', '0014_chatupload'),
+    ]
+
+    # pg_trgm is installed by accounts.0019.
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX chat_chatroom_name_trgm ON chat_chatroom USING gin (UPPER(name) gin_trgm_ops);',
+            'DROP INDEX chat_chatroom_name_trgm;',
+        ),
+    ]
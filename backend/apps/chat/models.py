@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -76,6 +78,7 @@ class Message(models.Model):
     )
     body = models.TextField(max_length=2000)
     image = models.FileField(upload_to='chat-images/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     video = models.FileField(upload_to='chat-videos/', blank=True, null=True)
     audio = models.FileField(upload_to='chat-audio/', blank=True, null=True)
     audio_duration = models.FloatField(null=True, blank=True)  # seconds
@@ -118,6 +121,37 @@ class Message(models.Model):
         return f"{self.sender.username}: {self.body[:50]}"
 
 
+class ChatUpload(models.Model):
+    """
+    Resumable upload of a chat attachment (see ``apps.chat.uploads``)
+    """
+    KIND_IMAGE = 'image'
+    KIND_VIDEO = 'video'
+    KIND_AUDIO = 'audio'
+    KIND_FILE = 'file'
+    KIND_CHOICES = (
+        (KIND_IMAGE, 'Image'),
+        (KIND_VIDEO, 'Video'),
+        (KIND_AUDIO, 'Audio'),
+        (KIND_FILE, 'File'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='uploads')
+    uploader = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_uploads')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()  # bytes
+    received = models.PositiveBigIntegerField(default=0)  # contiguous bytes staged so far
+    file = models.FileField(max_length=255, blank=True)  # set once completed
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.uploader_id}: {self.file_name} ({self.received}/{self.size})"
+
+
 class Call(models.Model):
     """
     Voice/Video call between users
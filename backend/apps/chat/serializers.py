@@ -1,12 +1,16 @@
 from rest_framework import serializers
 from django.core.cache import cache
-from .models import ChatRoom, Message, ChatRoomMembership, Call
+
+from apps.accounts.presence import get_presence
+from .media import attachment_url
+from .models import ChatRoom, ChatUpload, Message, ChatRoomMembership, Call
 
 
 class MessageSerializer(serializers.ModelSerializer):
     sender_username = serializers.CharField(source='sender.username', read_only=True)
     sender_id = serializers.IntegerField(source='sender.id', read_only=True)
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     video_url = serializers.SerializerMethodField()
     audio_url = serializers.SerializerMethodField()
     file_url = serializers.SerializerMethodField()
@@ -25,6 +29,7 @@ class MessageSerializer(serializers.ModelSerializer):
             'reply_to_preview',
             'body',
             'image_url',
+            'image_variants',
             'video_url',
             'audio_url',
             'audio_duration',
@@ -40,37 +45,29 @@ class MessageSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('sender', 'room', 'created_at')
 
+    def _attachment_url(self, obj, kind):
+        if not getattr(obj, kind):
+            return None
+        return attachment_url(self.context.get('request'), obj.pk, kind)
+
     def get_image_url(self, obj):
+        return self._attachment_url(obj, 'image')
+
+    def get_image_variants(self, obj):
         request = self.context.get('request')
-        if obj.image and request:
-            return request.build_absolute_uri(obj.image.url)
-        if obj.image:
-            return obj.image.url
-        return None
+        return {
+            fmt: {width: attachment_url(request, obj.pk, 'image', f'{fmt}:{width}') for width in names}
+            for fmt, names in (obj.image_variants or {}).items()
+        }
 
     def get_video_url(self, obj):
-        request = self.context.get('request')
-        if obj.video and request:
-            return request.build_absolute_uri(obj.video.url)
-        if obj.video:
-            return obj.video.url
-        return None
+        return self._attachment_url(obj, 'video')
 
     def get_audio_url(self, obj):
-        request = self.context.get('request')
-        if obj.audio and request:
-            return request.build_absolute_uri(obj.audio.url)
-        if obj.audio:
-            return obj.audio.url
-        return None
+        return self._attachment_url(obj, 'audio')
 
     def get_file_url(self, obj):
-        request = self.context.get('request')
-        if obj.file and request:
-            return request.build_absolute_uri(obj.file.url)
-        if obj.file:
-            return obj.file.url
-        return None
+        return self._attachment_url(obj, 'file')
 
     def get_reply_to_preview(self, obj):
         if not obj.reply_to:
@@ -84,6 +81,14 @@ class MessageSerializer(serializers.ModelSerializer):
             'is_deleted': reply.is_deleted,
         }
 
+
+class ChatUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChatUpload
+        fields = ('id', 'room', 'kind', 'file_name', 'content_type', 'size', 'received', 'created_at', 'completed_at')
+        read_only_fields = fields
+
+
 class ChatRoomSerializer(serializers.ModelSerializer):
     last_message = serializers.SerializerMethodField()
     other_user = serializers.SerializerMethodField()
@@ -129,9 +134,7 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         if request and request.user:
             other = obj.participants.exclude(id=request.user.id).first()
             if other:
-                cache_key = f"user:presence:{other.id}"
-                is_online = bool(cache.get(cache_key))
-                last_seen = cache.get(f"user:last_seen:{other.id}")
+                seen = get_presence(other.id)
                 if other.avatar_url:
                     avatar_url = other.avatar_url
                 elif other.avatar_file and request:
@@ -144,8 +147,8 @@ class ChatRoomSerializer(serializers.ModelSerializer):
                     'id': other.id,
                     'username': other.username,
                     'avatar_url': avatar_url,
-                    'is_online': is_online,
-                    'last_seen': last_seen,
+                    'is_online': seen['is_online'],
+                    'last_seen': seen['last_seen'],
                 }
         return None
 
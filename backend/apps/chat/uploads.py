@@ -0,0 +1,173 @@
+"""
+Resumable chunked uploads for chat attachments.
+
+A client creates a ``ChatUpload`` with the file's kind, name, type and size,
+then PUTs the bytes in chunks of at most ``MAX_CHUNK_SIZE`` with
+``Content-Range: bytes start-end/size``. Each chunk is copied from the request
+stream into a staging file under ``CHAT_UPLOAD_DIR`` in small buffers, so a
+worker never holds a chunk in memory. After a dropped connection the client
+reads ``received`` from the upload and continues from that byte. ``complete``
+moves the staged file into media storage; ``send_message`` then attaches it by
+id. Uploads that are never sent are removed by ``purge_chat_uploads``.
+"""
+import os
+import re
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChatUpload, Message
+
+ALLOWED_FILE_EXTENSIONS = ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.txt', '.zip', '.rar']
+MAX_ATTACHMENT_SIZE = 50 * 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+COPY_BUFFER_SIZE = 64 * 1024
+UPLOAD_TTL = timedelta(days=1)
+
+CONTENT_TYPE_PREFIXES = {
+    ChatUpload.KIND_IMAGE: 'image/',
+    ChatUpload.KIND_VIDEO: 'video/',
+    ChatUpload.KIND_AUDIO: 'audio/',
+}
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def validate_attachment(kind: str, file_name: str, content_type: str, size: int) -> None:
+    if kind not in dict(ChatUpload.KIND_CHOICES):
+        raise UploadError(f'kind must be one of: {", ".join(dict(ChatUpload.KIND_CHOICES))}')
+    if not file_name:
+        raise UploadError('file_name is required')
+    if size <= 0:
+        raise UploadError('File is empty')
+    if size > MAX_ATTACHMENT_SIZE:
+        raise UploadError('File too large (max 50MB)')
+    prefix = CONTENT_TYPE_PREFIXES.get(kind)
+    if prefix and not content_type.startswith(prefix):
+        raise UploadError(f'{kind.capitalize()} must be a valid {kind} file')
+    if kind == ChatUpload.KIND_FILE and os.path.splitext(file_name)[1].lower() not in ALLOWED_FILE_EXTENSIONS:
+        raise UploadError(f'File type not allowed. Allowed: {", ".join(ALLOWED_FILE_EXTENSIONS)}')
+
+
+def staging_path(upload: ChatUpload) -> Path:
+    return Path(settings.CHAT_UPLOAD_DIR) / f'{upload.pk}.part'
+
+
+def get_upload(room, user, upload_id):
+    try:
+        upload_id = uuid.UUID(str(upload_id))
+    except ValueError:
+        return None
+    return ChatUpload.objects.filter(pk=upload_id, room=room, uploader=user).first()
+
+
+def parse_content_range(header, size: int, content_length) -> tuple:
+    """``(start, end)`` of a chunk; the range must lie inside the upload and match the body length."""
+    match = _CONTENT_RANGE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range must be "bytes start-end/size"')
+    start, end, total = map(int, match.groups())
+    if total != size or start > end or end >= size:
+        raise UploadError('Content-Range does not match the upload', status=416)
+    length = end - start + 1
+    if length > MAX_CHUNK_SIZE:
+        raise UploadError(f'Chunks may be at most {MAX_CHUNK_SIZE} bytes', status=413)
+    if str(length) != str(content_length):
+        raise UploadError('Content-Length does not match Content-Range')
+    return start, end
+
+
+def write_chunk(upload_id, stream, start: int, end: int) -> ChatUpload:
+    """
+    Copy ``stream`` into the staging file at ``start`` and advance ``received``.
+
+    The row is locked only to check the offset and, after copying, to advance
+    ``received``; the copy itself runs outside any transaction, so a slow
+    client does not hold a row lock or a connection's transaction open. A
+    chunk may overlap bytes already received (a retry) but must not leave a
+    gap; since ``received`` only grows, a start checked once stays valid. If
+    the body ends early, what arrived still counts.
+    """
+    with transaction.atomic():
+        upload = ChatUpload.objects.select_for_update().get(pk=upload_id)
+        if upload.completed_at:
+            raise UploadError('Upload is already complete', status=409)
+        if start > upload.received:
+            raise UploadError(f'Expected a chunk starting at byte {upload.received}', status=409)
+    path = staging_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    length = end - start + 1
+    written = 0
+    # Create without truncating: a concurrent retry may be writing the same file.
+    with open(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b') as staged:
+        staged.seek(start)
+        while written < length:
+            try:
+                data = stream.read(min(COPY_BUFFER_SIZE, length - written))
+            except OSError:
+                break
+            if not data:
+                break
+            staged.write(data)
+            written += len(data)
+    with transaction.atomic():
+        upload = ChatUpload.objects.select_for_update().get(pk=upload_id)
+        if not upload.completed_at and start + written > upload.received:
+            upload.received = start + written
+            upload.save(update_fields=['received'])
+    return upload
+
+
+def complete_upload(upload_id) -> ChatUpload:
+    """Move a fully received upload into the media storage of its ``Message`` field. Repeated calls are no-ops."""
+    with transaction.atomic():
+        upload = ChatUpload.objects.select_for_update().get(pk=upload_id)
+        if upload.completed_at:
+            return upload
+        if upload.received < upload.size:
+            raise UploadError(f'Upload is incomplete ({upload.received} of {upload.size} bytes)', status=409)
+        field = Message._meta.get_field(upload.kind)
+        path = staging_path(upload)
+        with open(path, 'rb') as staged:
+            name = field.generate_filename(None, upload.file_name)
+            upload.file.name = field.storage.save(name, File(staged, name=upload.file_name))
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['file', 'completed_at'])
+        transaction.on_commit(lambda: path.unlink(missing_ok=True))
+    return upload
+
+
+def message_fields(upload: ChatUpload) -> dict:
+    """``Message`` fields that attach a completed upload."""
+    fields = {upload.kind: upload.file.name}
+    if upload.kind == ChatUpload.KIND_AUDIO:
+        fields['audio_size'] = upload.size
+    elif upload.kind == ChatUpload.KIND_FILE:
+        fields.update(file_name=upload.file_name, file_size=upload.size)
+    return fields
+
+
+def purge_stale_uploads(max_age: timedelta = UPLOAD_TTL) -> int:
+    """Delete uploads older than ``max_age`` that were never sent, with their staged or stored files."""
+    purged = 0
+    stale = ChatUpload.objects.filter(created_at__lt=timezone.now() - max_age)
+    for upload in stale.iterator():
+        # Only remove files when this call deleted the row; send_message may have just consumed it.
+        if not ChatUpload.objects.filter(pk=upload.pk).delete()[0]:
+            continue
+        staging_path(upload).unlink(missing_ok=True)
+        if upload.file:
+            upload.file.storage.delete(upload.file.name)
+        purged += 1
+    return purged
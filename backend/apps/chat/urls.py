@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ChatRoomViewSet, CallViewSet
+from .views import ChatRoomViewSet, CallViewSet, MessageMediaView
 
 router = DefaultRouter()
 router.register(r'chat/rooms', ChatRoomViewSet, basename='chatroom')
@@ -8,4 +8,5 @@ router.register(r'calls', CallViewSet, basename='call')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('chat/messages/<int:message_id>/<str:kind>/', MessageMediaView.as_view(), name='chat-message-media'),
 ]
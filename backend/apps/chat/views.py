@@ -1,18 +1,36 @@
+import os
 import time
 from django.db.models import Q, Max
+from django.db.models.fields.files import FieldFile
 from django.utils import timezone
 from django.conf import settings
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 from rest_framework.parsers import FormParser, MultiPartParser, JSONParser
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from django.core.cache import cache
 
-from .models import ChatRoom, Message, ChatRoomMembership, Call
-from .serializers import ChatRoomSerializer, MessageSerializer, CallSerializer, StartCallSerializer
+from crowdbank.images import schedule_variants
+from crowdbank.search import SEARCH_LIMIT, trigram_search
+from .media import media_response, token_user_id
+from .models import ChatRoom, ChatUpload, Message, ChatRoomMembership, Call
+from .serializers import ChatRoomSerializer, ChatUploadSerializer, MessageSerializer, CallSerializer, StartCallSerializer
+from .uploads import (
+    MAX_ATTACHMENT_SIZE,
+    ALLOWED_FILE_EXTENSIONS,
+    UploadError,
+    complete_upload,
+    get_upload,
+    message_fields,
+    parse_content_range,
+    validate_attachment,
+    write_chunk,
+)
 
 User = get_user_model()
 
@@ -118,8 +136,18 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         reply_to_id = request.data.get('reply_to')
         reply_to = None
 
-        if not body and not image and not audio and not file:
-            return Response({'error': 'Message body, image, audio, or file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        # Attachments sent with the resumable upload API are referenced by id
+        upload = None
+        upload_id = request.data.get('upload')
+        if upload_id:
+            upload = get_upload(room, request.user, upload_id)
+            if upload is None or not upload.completed_at:
+                return Response({'error': 'Upload not found or not complete'}, status=status.HTTP_400_BAD_REQUEST)
+            if image or audio or file:
+                return Response({'error': 'Send either an upload or a file, not both'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not body and not image and not audio and not file and not upload:
+            return Response({'error': 'Message body, image, audio, file, or upload is required'}, status=status.HTTP_400_BAD_REQUEST)
 
         if body and len(body) > 2000:
             return Response({'error': 'Message too long (max 2000 characters)'}, status=status.HTTP_400_BAD_REQUEST)
@@ -131,7 +159,6 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Audio must be a valid audio file'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Validate file type (allow common document types)
-        ALLOWED_FILE_EXTENSIONS = ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.txt', '.zip', '.rar']
         file_name = ""
         file_size = None
         if file:
@@ -141,7 +168,7 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
             ext = os.path.splitext(file.name)[1].lower()
             if ext not in ALLOWED_FILE_EXTENSIONS:
                 return Response({'error': f'File type not allowed. Allowed: {", ".join(ALLOWED_FILE_EXTENSIONS)}'}, status=status.HTTP_400_BAD_REQUEST)
-            if file_size > 50 * 1024 * 1024:  # 50MB limit
+            if file_size > MAX_ATTACHMENT_SIZE:
                 return Response({'error': 'File too large (max 50MB)'}, status=status.HTTP_400_BAD_REQUEST)
 
         if reply_to_id:
@@ -153,6 +180,8 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         # Calculate audio metadata if audio file is provided
         audio_duration = None
         audio_size = None
+        if upload and upload.kind == ChatUpload.KIND_AUDIO:
+            audio = upload.file.open('rb')
         if audio:
             audio_size = audio.size
 
@@ -196,20 +225,32 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
                     logging.getLogger('apps.chat').warning(f"Could not read audio duration: {e}")
                     audio.seek(0)
 
+        attachment = {
+            'image': image,
+            'audio': audio,
+            'audio_duration': audio_duration,
+            'audio_size': audio_size,
+            'file': file,
+            'file_name': file_name,
+            'file_size': file_size,
+        }
+        if upload:
+            attachment.update(message_fields(upload))
+            upload.file.close()
+
         message = Message.objects.create(
             room=room,
             sender=request.user,
             reply_to=reply_to,
             body=body,
-            image=image,
-            audio=audio,
-            audio_duration=audio_duration,
-            audio_size=audio_size,
-            file=file,
-            file_name=file_name,
-            file_size=file_size
+            **attachment
         )
+        if upload:
+            # The stored file now belongs to the message
+            ChatUpload.objects.filter(pk=upload.pk).delete()
 
+        if message.image:
+            schedule_variants(message, 'image', cache_keys=[f"chat:room:{room.id}:messages"])
         serializer = MessageSerializer(message, context={'request': request})
         cache.delete(f"chat:room:{room.id}:messages")
         participant_ids = list(room.participants.values_list('id', flat=True))
@@ -281,6 +322,64 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
 
     send_message.parser_classes = [MultiPartParser, FormParser, JSONParser]
 
+    @action(detail=True, methods=['post'], url_path='uploads')
+    def create_upload(self, request, pk=None):
+        """Start a resumable attachment upload (see apps.chat.uploads)"""
+        room = self.get_object()
+        kind = request.data.get('kind', '')
+        file_name = os.path.basename(str(request.data.get('file_name', '')))[:255]
+        content_type = str(request.data.get('content_type', ''))[:100]
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            return Response({'error': 'size is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            validate_attachment(kind, file_name, content_type, size)
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=exc.status)
+
+        upload = ChatUpload.objects.create(
+            room=room,
+            uploader=request.user,
+            kind=kind,
+            file_name=file_name,
+            content_type=content_type,
+            size=size,
+        )
+        return Response(ChatUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get', 'put'], url_path=r'uploads/(?P<upload_id>[^/.]+)')
+    def upload_chunk(self, request, pk=None, upload_id=None):
+        """GET reports how many bytes arrived; PUT stores one chunk described by Content-Range"""
+        room = self.get_object()
+        upload = get_upload(room, request.user, upload_id)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.method == 'PUT':
+            try:
+                start, end = parse_content_range(
+                    request.headers.get('Content-Range'), upload.size, request.META.get('CONTENT_LENGTH')
+                )
+                # Read the raw body stream; request.data would buffer the whole chunk
+                upload = write_chunk(upload.pk, request.stream, start, end)
+            except UploadError as exc:
+                return Response({'error': str(exc), 'received': upload.received}, status=exc.status)
+        return Response(ChatUploadSerializer(upload).data)
+
+    @action(detail=True, methods=['post'], url_path=r'uploads/(?P<upload_id>[^/.]+)/complete')
+    def finish_upload(self, request, pk=None, upload_id=None):
+        """Store a fully received upload so send_message can attach it"""
+        room = self.get_object()
+        upload = get_upload(room, request.user, upload_id)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            upload = complete_upload(upload.pk)
+        except UploadError as exc:
+            return Response({'error': str(exc), 'received': upload.received}, status=exc.status)
+        return Response(ChatUploadSerializer(upload).data)
+
     @action(detail=True, methods=['patch', 'delete'], url_path='messages/(?P<message_id>[^/.]+)')
     def message_detail(self, request, pk=None, message_id=None):
         """Edit or delete a message in a chat room"""
@@ -307,6 +406,7 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
             message.audio = None
             message.is_deleted = True
             message.save(update_fields=['body', 'image', 'audio', 'is_deleted', 'updated_at'])
+            schedule_variants(message, 'image')
 
             serializer = MessageSerializer(message, context={'request': request})
             cache.delete(f"chat:room:{room.id}:messages")
@@ -392,7 +492,7 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         search = request.query_params.get('search', '').strip()
         queryset = ChatRoom.objects.filter(is_group=True, is_private=False)
         if search:
-            queryset = queryset.filter(name__icontains=search)
+            queryset = trigram_search(queryset, 'name', search)[:SEARCH_LIMIT]
         serializer = self.get_serializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -544,6 +644,36 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'Admin updated.'})
 
 
+class MessageMediaView(APIView):
+    """
+    Serve a message attachment to room participants, with Range and conditional request support.
+    Media elements cannot send the JWT header, so the user named by a signed ``token`` from the
+    serialized URL is accepted instead; either way that user must still be a participant.
+    """
+    permission_classes = [permissions.AllowAny]
+    kinds = ('image', 'video', 'audio', 'file')
+
+    def get(self, request, message_id, kind):
+        if kind not in self.kinds:
+            return Response({'error': 'Unknown attachment'}, status=status.HTTP_404_NOT_FOUND)
+        variant = request.query_params.get('variant', '')
+        user_id = request.user.id if request.user.is_authenticated else None
+        if user_id is None:
+            user_id = token_user_id(request.query_params.get('token'), message_id, kind, variant)
+            if user_id is None:
+                raise NotAuthenticated()
+        message = Message.objects.filter(pk=message_id, is_deleted=False, room__participants=user_id).first()
+        attachment = getattr(message, kind, None)
+        if attachment and variant:
+            fmt, _, width = variant.partition(':')
+            name = (message.image_variants or {}).get(fmt, {}).get(width) if kind == 'image' else None
+            attachment = FieldFile(message, attachment.field, name) if name else None
+        if not attachment:
+            return Response({'error': 'Attachment not found'}, status=status.HTTP_404_NOT_FOUND)
+        download_name = (message.file_name or attachment.name) if kind == 'file' else None
+        return media_response(request._request, attachment, download_name)
+
+
 class CallViewSet(viewsets.ViewSet):
     """
     API endpoints for voice/video calls
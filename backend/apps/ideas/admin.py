@@ -1,5 +1,7 @@
 from django.contrib import admin
 from .models import Comment, Idea, IdeaLike, Tag
+from .search import refresh_idea_search
+from .tags import forget_tags
 
 
 @admin.register(Idea)
@@ -8,11 +10,27 @@ class IdeaAdmin(admin.ModelAdmin):
     search_fields = ('title', 'short_description', 'full_description')
     list_filter = ('category',)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_idea_search(form.instance)
+
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        forget_tags()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        forget_tags()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        forget_tags()
+
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
@@ -0,0 +1,81 @@
+"""
+Cache of the viewer-independent part of serialized ideas.
+
+An entry is keyed by idea id, language and a version stamp derived from the
+inputs of the representation that are already loaded with the idea: its
+``updated_at``, its tag names, the author's username and avatar, the image
+variants and the rendered field set (``?fields=``). Editing an idea, changing
+its tags, changing the author's avatar or finishing its image variants
+therefore produces a new key and the stale entry simply expires. Viewer flags and the live counters
+are never cached; the serializer fills them in on every read.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+
+REPRESENTATION_TTL = 60 * 60
+
+
+def _version(idea, fields, base_url: str) -> str:
+    parts = [idea.updated_at.isoformat() if idea.updated_at else '', base_url, ','.join(sorted(fields))]
+    if 'tags' in fields:
+        parts.append(','.join(sorted(tag.name for tag in idea.tags.all())))
+    if 'image_variants' in fields:
+        parts.append(json.dumps(idea.image_variants, sort_keys=True))
+    if 'author' in fields:
+        author = idea.author
+        parts.extend((author.username, author.avatar_url or '', author.avatar_file.name or ''))
+        parts.append(json.dumps(author.avatar_variants, sort_keys=True))
+    return hashlib.md5('\x1f'.join(parts).encode()).hexdigest()
+
+
+class IdeaRepresentationCache:
+    """
+    Per-request access to cached idea representations.
+
+    ``prime`` fetches a whole page of entries with one ``get_many`` and defers
+    the writes for misses until ``flush``, so a list costs two cache round trips.
+    """
+
+    def __init__(self, lang: str, fields, base_url: str = ''):
+        self.lang = lang
+        self.fields = fields
+        self.base_url = base_url
+        self.hits = {}
+        self.pending = None
+
+    @classmethod
+    def from_context(cls, context, lang: str, fields) -> 'IdeaRepresentationCache':
+        cached = context.get('idea_representations')
+        if cached is None or cached.lang != lang or cached.fields != fields:
+            request = context.get('request')
+            cached = cls(lang, fields, request.build_absolute_uri('/') if request else '')
+            context['idea_representations'] = cached
+        return cached
+
+    def key(self, idea) -> str:
+        return f'ideas:repr:{idea.pk}:{self.lang}:{_version(idea, self.fields, self.base_url)}'
+
+    def prime(self, ideas) -> None:
+        self.hits.update(cache.get_many([self.key(idea) for idea in ideas]))
+        self.pending = {}
+
+    def get(self, idea):
+        key = self.key(idea)
+        if key in self.hits:
+            return self.hits[key]
+        if self.pending is not None:
+            return None
+        return cache.get(key)
+
+    def set(self, idea, data) -> None:
+        if self.pending is not None:
+            self.pending[self.key(idea)] = data
+        else:
+            cache.set(self.key(idea), data, REPRESENTATION_TTL)
+
+    def flush(self) -> None:
+        if self.pending:
+            cache.set_many(self.pending, REPRESENTATION_TTL)
+        self.pending = None
@@ -0,0 +1,173 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from redis.exceptions import ResponseError
+
+from apps.accounts.stats import bump_stats, idea_deleted
+from crowdbank import versions
+from crowdbank.redis_client import get_redis
+from . import timeline, trending
+from .models import Comment, CommentLike, Idea, IdeaLike
+
+PENDING_VIEWS_KEY = 'ideas:views:pending'
+FLUSHING_VIEWS_KEY = 'ideas:views:flushing'
+
+
+def bump_idea_counter(idea_id: int, field: str, delta: int) -> None:
+    """Atomically shift a stored counter on an idea, never below zero."""
+    Idea.objects.filter(pk=idea_id).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def bump_comment_likes(comment_id: int, delta: int) -> None:
+    """Atomically shift ``Comment.like_count``, never below zero."""
+    Comment.objects.filter(pk=comment_id).update(like_count=Greatest(F('like_count') + delta, 0))
+
+
+def delete_comment(comment: Comment) -> None:
+    """Delete a comment (and its replies) and keep ``Idea.comment_count`` and authors' stats in step."""
+    per_author = dict(
+        Comment.objects.filter(Q(pk=comment.pk) | Q(parent_id=comment.pk))
+        .values('author_id')
+        .annotate(total=Count('pk'))
+        .values_list('author_id', 'total')
+    )
+    author_ids = set(per_author)
+    with transaction.atomic():
+        _, deleted = comment.delete()
+        removed = deleted.get(Comment._meta.label, 0)
+        if removed:
+            bump_idea_counter(comment.idea_id, 'comment_count', -removed)
+            category = Idea.objects.filter(pk=comment.idea_id).values_list('category', flat=True).first()
+            for author_id, total in per_author.items():
+                bump_stats(author_id, category, comments_count=-total)
+    versions.bump(
+        'ideas',
+        versions.scope('idea', comment.idea_id),
+        *(versions.scope('user', author_id) for author_id in author_ids),
+    )
+
+
+def delete_idea(idea: Idea) -> None:
+    """Delete an idea and drop it from authors' stats, the trending index and followers' timelines."""
+    idea_id = idea.pk
+    with transaction.atomic():
+        idea_deleted(idea)
+        idea.delete()
+    versions.bump('ideas', versions.scope('idea', idea_id), versions.scope('user', idea.author_id))
+    trending.idea_deleted(idea_id)
+    timeline.idea_removed(idea_id, idea.author_id)
+
+
+def _count_of(model, field: str = 'idea'):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('id'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def reconcile_idea_counters(batch_size: int = 1000) -> int:
+    """Recount likes and comments for every idea and fix drifted rows. Returns the number fixed."""
+    fixed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            Idea.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .annotate(actual_likes=_count_of(IdeaLike), actual_comments=_count_of(Comment))
+            .only('pk', 'like_count', 'comment_count')[:batch_size]
+        )
+        if not batch:
+            return fixed
+        last_id = batch[-1].pk
+        drifted = []
+        for idea in batch:
+            if idea.like_count != idea.actual_likes or idea.comment_count != idea.actual_comments:
+                idea.like_count = idea.actual_likes
+                idea.comment_count = idea.actual_comments
+                drifted.append(idea)
+        if drifted:
+            Idea.objects.bulk_update(drifted, ['like_count', 'comment_count'])
+            fixed += len(drifted)
+
+
+def reconcile_comment_counters(batch_size: int = 1000) -> int:
+    """Recount likes for every comment and fix drifted rows. Returns the number fixed."""
+    fixed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            Comment.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .annotate(actual_likes=_count_of(CommentLike, 'comment'))
+            .only('pk', 'like_count')[:batch_size]
+        )
+        if not batch:
+            return fixed
+        last_id = batch[-1].pk
+        drifted = []
+        for comment in batch:
+            if comment.like_count != comment.actual_likes:
+                comment.like_count = comment.actual_likes
+                drifted.append(comment)
+        if drifted:
+            Comment.objects.bulk_update(drifted, ['like_count'])
+            fixed += len(drifted)
+
+
+def record_idea_view(idea_id: int) -> int:
+    """
+    Count one view of an idea and return the increment not yet stored in ``views_count``.
+
+    With Redis the view is buffered with a single HINCRBY and written later by
+    ``flush_idea_views``; without it the column is updated directly. Views a
+    flush is still writing count as unstored too.
+    """
+    client = get_redis()
+    if client is None:
+        Idea.objects.filter(pk=idea_id).update(views_count=F('views_count') + 1)
+        return 1
+    pipe = client.pipeline(transaction=False)
+    pipe.hincrby(PENDING_VIEWS_KEY, idea_id, 1)
+    pipe.hget(FLUSHING_VIEWS_KEY, idea_id)
+    buffered, flushing = pipe.execute()
+    return int(buffered) + int(flushing or 0)
+
+
+def flush_idea_views(batch_size: int = 500) -> int:
+    """Write buffered view increments to ``Idea.views_count`` in bulk. Returns the number of ideas touched."""
+    client = get_redis()
+    if client is None:
+        return 0
+    # The flushing hash is deleted before the UPDATE commits and put back if the
+    # transaction fails, so a leftover one was never written; finish it first.
+    if not client.exists(FLUSHING_VIEWS_KEY):
+        try:
+            client.rename(PENDING_VIEWS_KEY, FLUSHING_VIEWS_KEY)
+        except ResponseError:
+            return 0
+    flushing = client.hgetall(FLUSHING_VIEWS_KEY)
+    pending = [(int(idea_id), int(delta)) for idea_id, delta in flushing.items()]
+    try:
+        with transaction.atomic():
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start:start + batch_size]
+                Idea.objects.filter(pk__in=[idea_id for idea_id, _ in chunk]).update(
+                    views_count=F('views_count') + Case(
+                        *[When(pk=idea_id, then=Value(delta)) for idea_id, delta in chunk],
+                        default=Value(0),
+                    )
+                )
+            # Dying between the commit and this delete would count the views twice;
+            # dying before the commit loses them at worst.
+            client.delete(FLUSHING_VIEWS_KEY)
+    except Exception:
+        if flushing:
+            client.hset(FLUSHING_VIEWS_KEY, mapping=flushing)
+        raise
+    return len(pending)
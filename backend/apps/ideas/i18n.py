@@ -0,0 +1,47 @@
+"""
+Language resolution of the ``*_i18n`` JSON columns inside Postgres.
+
+``localize`` annotates ``<base>_localized`` with the requested language's
+string, falling back to the base column, and defers the JSON column itself, so
+only the chosen strings leave the database. Serializers read the annotation
+through ``apply_translations`` and fall back to picking from the loaded JSON
+when the queryset was not localized.
+"""
+from django.db.models import F, TextField, Value
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Coalesce, NullIf
+
+LOCALIZED_SUFFIX = '_localized'
+
+
+def localized(base: str, i18n_field: str, lang: str):
+    return Coalesce(NullIf(KeyTextTransform(lang, i18n_field), Value('')), F(base), output_field=TextField())
+
+
+def localize(queryset, pairs, lang: str, fields):
+    """Resolve each ``(base, i18n_field)`` pair in SQL when ``base`` is rendered but ``i18n_field`` is not."""
+    annotations = {}
+    deferred = []
+    for base, i18n_field in pairs:
+        if base in fields and i18n_field not in fields:
+            annotations[f'{base}{LOCALIZED_SUFFIX}'] = localized(base, i18n_field, lang)
+            deferred.append(i18n_field)
+    return queryset.annotate(**annotations).defer(*deferred)
+
+
+def without_translations(fields) -> tuple:
+    return tuple(name for name in fields if not name.endswith('_i18n'))
+
+
+def apply_translations(data, instance, pairs, lang: str):
+    for base, i18n_field in pairs:
+        if base not in data:
+            continue
+        resolved = getattr(instance, f'{base}{LOCALIZED_SUFFIX}', None)
+        if resolved is not None:
+            data[base] = resolved
+            continue
+        translations = getattr(instance, i18n_field) or {}
+        if isinstance(translations, dict) and translations.get(lang):
+            data[base] = translations[lang]
+    return data
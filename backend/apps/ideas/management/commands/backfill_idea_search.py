@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.ideas.search import backfill_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored full-text search vector on ideas in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only fill ideas that do not have a search vector yet.',
+        )
+
+    def handle(self, *args, **options):
+        updated = backfill_search_vectors(
+            batch_size=options['batch_size'],
+            only_missing=options['missing_only'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Updated search vectors on {updated} idea(s).'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.ideas.timeline import fan_out_queued
+
+
+class Command(BaseCommand):
+    help = 'Push newly published ideas to, and remove deleted ideas from, followers\' timelines. Run every minute from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        fanned_out = fan_out_queued(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated follower timelines for {fanned_out} idea(s).'))
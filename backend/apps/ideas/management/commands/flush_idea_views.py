@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.ideas.counters import flush_idea_views
+
+
+class Command(BaseCommand):
+    help = 'Write view counts buffered in Redis to Idea.views_count. Run every minute from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        flushed = flush_idea_views(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Flushed buffered views for {flushed} idea(s).'))
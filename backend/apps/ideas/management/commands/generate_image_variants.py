@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.chat.models import Message
+from apps.ideas.models import Comment, Idea
+from crowdbank.images import generate_variants
+
+User = get_user_model()
+
+# (model, file field, variants field)
+TARGETS = (
+    (Idea, 'image', 'image_variants'),
+    (Comment, 'image', 'image_variants'),
+    (Message, 'image', 'image_variants'),
+    (User, 'avatar_file', 'avatar_variants'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/JPEG variants for uploaded images that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate variants that already exist.')
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        for model, field, variants_field in TARGETS:
+            storage = model._meta.get_field(field).storage
+            rows = model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            if not options['all']:
+                rows = rows.filter(**{variants_field: {}})
+            for pk, name in rows.values_list('pk', field).iterator():
+                try:
+                    variants = generate_variants(storage, name)
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{model.__name__} {pk}: {name}: {exc}')
+                    continue
+                model.objects.filter(pk=pk, **{field: name}).update(**{variants_field: variants})
+                generated += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {generated} image(s), {failed} failed.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.ideas.trending import TRENDING_WINDOWS, rebuild_trending
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the Redis trending index for every window. Run hourly from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, action='append', choices=TRENDING_WINDOWS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        sizes = rebuild_trending(windows=options['days'] or TRENDING_WINDOWS, batch_size=options['batch_size'])
+        if not sizes:
+            self.stdout.write(self.style.WARNING('Redis is not configured; trending is served from the database.'))
+            return
+        for days, size in sizes.items():
+            self.stdout.write(self.style.SUCCESS(f'{days}d window: {size} idea(s) ranked.'))
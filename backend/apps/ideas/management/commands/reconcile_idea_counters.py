@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.ideas.counters import reconcile_comment_counters, reconcile_idea_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount stored like/comment counters on ideas and comments and fix any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = reconcile_idea_counters(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled counters on {fixed} idea(s).'))
+        fixed = reconcile_comment_counters(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled like counters on {fixed} comment(s).'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.ideas.related import rebuild_related, refresh_dirty
+
+
+class Command(BaseCommand):
+    help = 'Recompute related ideas queued in Redis. Run every few minutes from cron; --all rebuilds every idea.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--all', action='store_true', help='Rebuild the index for every idea.')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            refreshed = rebuild_related(batch_size=options['batch_size'])
+        else:
+            refreshed = refresh_dirty(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed related ideas for {refreshed} idea(s).'))
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:18
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Idea = apps.get_model('ideas', 'Idea')
+    Comment = apps.get_model('ideas', 'Comment')
+    IdeaLike = apps.get_model('ideas', 'IdeaLike')
+
+    def count_of(model):
+        return Coalesce(
+            models.Subquery(
+                model.objects.filter(idea=models.OuterRef('pk'))
+                .order_by()
+                .values('idea')
+                .annotate(total=models.Count('id'))
+                .values('total')
+            ),
+            0,
+        )
+
+    Idea.objects.update(like_count=count_of(IdeaLike), comment_count=count_of(Comment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0011_idea_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['-like_count', '-id'], name='ideas_idea_like_co_9b7b25_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:20
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector, SearchVectorCombinable, SearchVectorField
+from django.db import migrations, models
+
+
+class JSONStringsVector(SearchVectorCombinable, models.Func):
+    """Frozen copy of ``apps.ideas.search.JSONStringsVector``, so this migration's SQL never changes."""
+    function = 'jsonb_to_tsvector'
+    template = "%(function)s(%(expressions)s, '[\"string\"]')"
+    output_field = SearchVectorField()
+
+    def __init__(self, expression, weight=None):
+        super().__init__(expression)
+        self.config = None
+        self.weight = models.Value(weight) if weight is not None else None
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        if self.weight is None:
+            return sql, params
+        weight_sql, weight_params = compiler.compile(self.weight)
+        return f'setweight({sql}, {weight_sql})', [*params, *weight_params]
+
+
+def backfill_search_vector(apps, schema_editor):
+    # Same weights as apps.ideas.search.build_search_vector, over the historical models.
+    Idea = apps.get_model('ideas', 'Idea')
+    Tag = apps.get_model('ideas', 'Tag')
+    tag_names = models.Subquery(
+        Tag.objects.filter(ideas=models.OuterRef('pk'))
+        .order_by()
+        .values('ideas')
+        .annotate(names=StringAgg('name', delimiter=' '))
+        .values('names')
+    )
+    Idea.objects.update(
+        search_vector=SearchVector('title', weight='A')
+        + JSONStringsVector('title_i18n', weight='A')
+        + SearchVector('short_description', weight='B')
+        + JSONStringsVector('short_description_i18n', weight='B')
+        + SearchVector(tag_names, weight='B')
+        + SearchVector('full_description', weight='C')
+        + JSONStringsVector('full_description_i18n', weight='C')
+        + SearchVector('category', weight='D')
+        + JSONStringsVector('category_i18n', weight='D')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0012_idea_like_count_comment_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='ideas_idea_search__31df35_gin'),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
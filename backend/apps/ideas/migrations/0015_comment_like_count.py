@@ -0,0 +1,37 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:41
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_like_counts(apps, schema_editor):
+    Comment = apps.get_model('ideas', 'Comment')
+    CommentLike = apps.get_model('ideas', 'CommentLike')
+    Comment.objects.update(
+        like_count=Coalesce(
+            models.Subquery(
+                CommentLike.objects.filter(comment=models.OuterRef('pk'))
+                .order_by()
+                .values('comment')
+                .annotate(total=models.Count('id'))
+                .values('total')
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0014_comment_thread_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_like_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0015_comment_like_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookmark',
+            index=models.Index(fields=['user', '-created_at', '-id'], include=('idea',), name='bookmark_user_recent_idx'),
+        ),
+    ]
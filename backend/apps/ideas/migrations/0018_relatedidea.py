@@ -0,0 +1,27 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0017_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedIdea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('idea', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_ideas', to='ideas.idea')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_to', to='ideas.idea')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['idea', '-score'], include=('related',), name='related_idea_score_idx')],
+                'unique_together': {('idea', 'related')},
+            },
+        ),
+    ]
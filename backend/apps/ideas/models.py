@@ -1,4 +1,6 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import RegexValidator, MaxLengthValidator
 from django.db import models
 
@@ -32,15 +34,21 @@ class Idea(models.Model):
     category_i18n = models.JSONField(default=dict, blank=True)
     tags = models.ManyToManyField(Tag, blank=True, related_name='ideas')
     image = models.ImageField(upload_to='idea-images/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ideas', db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     views_count = models.PositiveIntegerField(default=0, db_index=True)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['-views_count']),
+            models.Index(fields=['-like_count', '-id']),
+            GinIndex(fields=['search_vector']),
         ]
 
     def __str__(self) -> str:
@@ -63,9 +71,21 @@ class Comment(models.Model):
     body = models.TextField()
     body_i18n = models.JSONField(default=dict, blank=True)
     image = models.FileField(upload_to='comment-images/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_pinned = models.BooleanField(default=False, db_index=True)
+    like_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['idea', '-is_pinned', '-created_at', '-id'],
+                condition=models.Q(parent__isnull=True),
+                name='comment_thread_idx',
+            ),
+            models.Index(fields=['parent', 'created_at', 'id'], name='comment_replies_idx'),
+        ]
+
     def __str__(self) -> str:
         return f'Comment {self.id} on {self.idea_id}'
 
@@ -106,8 +126,24 @@ class Bookmark(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
+            models.Index(fields=['user', '-created_at', '-id'], include=['idea'], name='bookmark_user_recent_idx'),
         ]
 
     def __str__(self) -> str:
         return f'{self.user.username} bookmarked {self.idea.title}'
 
+
+class RelatedIdea(models.Model):
+    """Precomputed neighbour of an idea, maintained by ``apps.ideas.related``"""
+    idea = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='related_ideas')
+    related = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='related_to')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('idea', 'related')
+        indexes = [
+            models.Index(fields=['idea', '-score'], include=['related'], name='related_idea_score_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.idea_id} -> {self.related_id} ({self.score:.2f})'
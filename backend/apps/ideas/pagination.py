@@ -0,0 +1,168 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from crowdbank.ranking import RankedSequence
+
+
+class RankedIdeas(RankedSequence):
+    """Ideas ranked in a Redis sorted set (trending windows, following timelines), for Django's ``Paginator``."""
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only cursor pagination on a composite key.
+
+    ``CursorPagination`` positions on the first ordering field only and skips
+    ties by offset, which breaks down when that field is low-cardinality (e.g.
+    ``is_pinned``). Here the cursor carries the full key of the last row, so
+    each page is a single range read and the response is ``{next, results}``.
+    """
+    ordering = ()
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.request = None
+        self.next_row = None
+
+    def encode_cursor(self, obj) -> str:
+        values = [getattr(obj, field.lstrip('-')) for field in self.ordering]
+        raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+        return b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, model):
+        encoded = self.request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(b64decode(encoded.encode(), validate=True).decode())
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (BinasciiError, UnicodeDecodeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def after(self, values) -> Q:
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def link_after(self, url: str, obj) -> str:
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(obj))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        queryset = queryset.order_by(*self.ordering)
+        values = self.decode_cursor(queryset.model)
+        if values is not None:
+            queryset = queryset.filter(self.after(values))
+        page = list(queryset[:self.page_size + 1])
+        self.next_row = page[self.page_size - 1] if len(page) > self.page_size else None
+        return page[:self.page_size]
+
+    def get_next_link(self):
+        if self.next_row is None:
+            return None
+        return self.link_after(self.request.build_absolute_uri(), self.next_row)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class IdeaCursorPagination(KeysetPagination):
+    """
+    Keyset pagination over the active ordering of an idea queryset.
+
+    The ordering (``?ordering=`` or the view default) is used as the composite
+    key with ``id`` appended as a tie-breaker, so ties on a field such as
+    ``like_count`` page correctly and no COUNT query is issued. Orderings on
+    related fields or expressions fall back to newest first.
+    """
+    default_ordering = ('-created_at', '-id')
+
+    def get_ordering(self, queryset):
+        current = queryset.query.order_by
+        ordering = [field for field in current if isinstance(field, str)]
+        concrete = {field.name for field in queryset.model._meta.concrete_fields}
+        if (
+            not ordering
+            or len(ordering) != len(current)
+            or any(field.lstrip('-') not in concrete | {'pk'} for field in ordering)
+        ):
+            ordering = list(self.default_ordering)
+        ordering = ['-id' if field == '-pk' else 'id' if field == 'pk' else field for field in ordering]
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = self.get_ordering(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+
+class IdeaPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in cursor mode.
+
+    Passing ``?cursor=`` (empty for the first page) switches the response to
+    ``{next, results}`` with an opaque cursor instead of ``?page=N``.
+    Pre-ranked sequences that are not querysets (``RankedIdeas`` over Redis) are
+    already cheap to page by number, so they always use page numbers.
+    """
+    cursor_query_param = 'cursor'
+    cursor_pagination_class = IdeaCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params and isinstance(queryset, QuerySet):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class CommentThreadPagination(KeysetPagination):
+    ordering = ('-is_pinned', '-created_at', '-id')
+
+
+class CommentRepliesPagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+
+
+class BookmarkPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
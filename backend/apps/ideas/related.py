@@ -0,0 +1,134 @@
+"""
+Precomputed "related ideas" index.
+
+Each idea keeps its ``RELATED_LIMIT`` best neighbours in ``RelatedIdea``,
+scored by shared tags, a shared category and co-likes (users who liked both
+ideas, over the idea's most recent ``LIKER_SAMPLE`` likers). The endpoint then
+reads one idea's rows from the ``(idea, -score)`` index.
+
+Writes that change a score mark ideas dirty instead of recomputing inline:
+with Redis they are collected in a set that ``refresh_related_ideas`` drains
+every few minutes; without Redis the ideas are refreshed immediately. Editing
+an idea's tags or category also marks the ideas that list it as a neighbour.
+"""
+import math
+
+from django.db import transaction
+from django.db.models import Count
+
+from crowdbank import versions
+from crowdbank.redis_client import get_redis
+from .models import Idea, IdeaLike, RelatedIdea
+
+RELATED_LIMIT = 20
+LIKER_SAMPLE = 500
+CATEGORY_SAMPLE = 50
+# Ideas listing a changed idea that are queued with it; the periodic rebuild catches the rest.
+NEIGHBOUR_SAMPLE = 200
+TAG_WEIGHT = 2.0
+CATEGORY_WEIGHT = 1.0
+CO_LIKE_WEIGHT = 1.5
+
+DIRTY_KEY = 'ideas:related:dirty'
+
+
+def related_scope(idea_id) -> str:
+    return versions.scope('related', idea_id)
+
+
+def score_candidates(idea: Idea) -> dict:
+    """Score every idea sharing a tag, a liker or the category with ``idea``."""
+    tag_ids = list(idea.tags.values_list('id', flat=True))
+    shared_tags = dict(
+        Idea.tags.through.objects.filter(tag_id__in=tag_ids)
+        .exclude(idea_id=idea.pk)
+        .values('idea_id')
+        .annotate(n=Count('id'))
+        .values_list('idea_id', 'n')
+    ) if tag_ids else {}
+    likers = IdeaLike.objects.filter(idea_id=idea.pk).order_by('-created_at').values('user_id')[:LIKER_SAMPLE]
+    co_likes = dict(
+        IdeaLike.objects.filter(user_id__in=likers)
+        .exclude(idea_id=idea.pk)
+        .values('idea_id')
+        .annotate(n=Count('id'))
+        .values_list('idea_id', 'n')
+    )
+    same_category = set(
+        Idea.objects.filter(category=idea.category)
+        .exclude(pk=idea.pk)
+        .order_by('-created_at')
+        .values_list('pk', flat=True)[:CATEGORY_SAMPLE]
+    )
+    candidates = shared_tags.keys() | co_likes.keys()
+    if candidates:
+        same_category.update(
+            Idea.objects.filter(pk__in=candidates, category=idea.category).values_list('pk', flat=True)
+        )
+    scores = {}
+    for candidate in candidates | same_category:
+        scores[candidate] = (
+            TAG_WEIGHT * shared_tags.get(candidate, 0)
+            + CATEGORY_WEIGHT * (candidate in same_category)
+            + CO_LIKE_WEIGHT * math.log1p(co_likes.get(candidate, 0))
+        )
+    return scores
+
+
+def refresh_related(idea_ids) -> int:
+    """Recompute the stored neighbours of ``idea_ids``. Returns how many ideas were refreshed."""
+    refreshed = 0
+    for idea in Idea.objects.filter(pk__in=list(idea_ids)).only('pk', 'category'):
+        scores = score_candidates(idea)
+        best = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:RELATED_LIMIT]
+        with transaction.atomic():
+            RelatedIdea.objects.filter(idea_id=idea.pk).delete()
+            RelatedIdea.objects.bulk_create(
+                [RelatedIdea(idea_id=idea.pk, related_id=related_id, score=score) for related_id, score in best]
+            )
+        versions.bump(related_scope(idea.pk))
+        refreshed += 1
+    return refreshed
+
+
+def queue_refresh(*idea_ids, neighbours: bool = False) -> None:
+    """
+    Queue ``idea_ids`` for a refresh after the current transaction commits.
+
+    ``neighbours`` also queues the ideas that currently list them, for changes
+    (tags, category) that move scores in both directions.
+    """
+    ids = set(idea_ids)
+    if neighbours:
+        ids.update(
+            RelatedIdea.objects.filter(related_id__in=idea_ids)
+            .order_by('-score')
+            .values_list('idea_id', flat=True)[:NEIGHBOUR_SAMPLE]
+        )
+    client = get_redis()
+    if client is None:
+        transaction.on_commit(lambda: refresh_related(ids))
+    else:
+        transaction.on_commit(lambda: client.sadd(DIRTY_KEY, *ids))
+
+
+def refresh_dirty(batch_size: int = 200) -> int:
+    """Drain the Redis dirty set. Returns the number of ideas refreshed."""
+    client = get_redis()
+    if client is None:
+        return 0
+    refreshed = 0
+    while True:
+        idea_ids = [int(idea_id) for idea_id in client.spop(DIRTY_KEY, batch_size) or ()]
+        if not idea_ids:
+            return refreshed
+        refreshed += refresh_related(idea_ids)
+
+
+def rebuild_related(batch_size: int = 200) -> int:
+    """Recompute the neighbours of every idea."""
+    refreshed = 0
+    idea_ids = list(Idea.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(idea_ids), batch_size):
+        refreshed += refresh_related(idea_ids[start:start + batch_size])
+    return refreshed
@@ -0,0 +1,52 @@
+from apps.accounts.models import Follow
+from .models import Bookmark, CommentLike, IdeaLike
+
+
+class ViewerRelations:
+    """
+    The requesting user's relations to the objects being serialized.
+
+    Each relation is resolved for a whole page with one ``IN`` query (see
+    ``prime``) and memoised, so list serialization costs a fixed number of
+    queries however many rows are rendered. Instances live in the serializer
+    context under ``viewer_relations``.
+    """
+    RELATIONS = {
+        'following': (Follow, 'follower_id', 'following_id'),
+        'liked_idea': (IdeaLike, 'user_id', 'idea_id'),
+        'bookmarked_idea': (Bookmark, 'user_id', 'idea_id'),
+        'liked_comment': (CommentLike, 'user_id', 'comment_id'),
+    }
+
+    def __init__(self, user):
+        self.user = user if user is not None and user.is_authenticated else None
+        self._known = {name: {} for name in self.RELATIONS}
+
+    @classmethod
+    def from_context(cls, context):
+        relations = context.get('viewer_relations')
+        if relations is None:
+            request = context.get('request')
+            relations = cls(getattr(request, 'user', None))
+            context['viewer_relations'] = relations
+        return relations
+
+    def prime(self, name, target_ids) -> None:
+        known = self._known[name]
+        missing = {target_id for target_id in target_ids if target_id not in known}
+        if not missing:
+            return
+        if self.user is None:
+            known.update(dict.fromkeys(missing, False))
+            return
+        model, owner_field, target_field = self.RELATIONS[name]
+        found = set(
+            model.objects.filter(**{owner_field: self.user.id, f'{target_field}__in': missing})
+            .values_list(target_field, flat=True)
+        )
+        known.update({target_id: target_id in found for target_id in missing})
+
+    def has(self, name, target_id) -> bool:
+        if target_id not in self._known[name]:
+            self.prime(name, [target_id])
+        return self._known[name][target_id]
@@ -0,0 +1,69 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector, SearchVectorCombinable, SearchVectorField
+from django.db.models import Func, OuterRef, Subquery, Value
+
+from .models import Idea, Tag
+
+
+class JSONStringsVector(SearchVectorCombinable, Func):
+    """tsvector of every string value inside a JSONB column (used for the ``*_i18n`` fields)."""
+    function = 'jsonb_to_tsvector'
+    template = "%(function)s(%(expressions)s, '[\"string\"]')"
+    output_field = SearchVectorField()
+
+    def __init__(self, expression, weight=None):
+        super().__init__(expression)
+        self.config = None
+        self.weight = Value(weight) if weight is not None else None
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        if self.weight is None:
+            return sql, params
+        weight_sql, weight_params = compiler.compile(self.weight)
+        return f'setweight({sql}, {weight_sql})', [*params, *weight_params]
+
+
+def build_search_vector():
+    tag_names = Subquery(
+        Tag.objects.filter(ideas=OuterRef('pk'))
+        .order_by()
+        .values('ideas')
+        .annotate(names=StringAgg('name', delimiter=' '))
+        .values('names')
+    )
+    return (
+        SearchVector('title', weight='A')
+        + JSONStringsVector('title_i18n', weight='A')
+        + SearchVector('short_description', weight='B')
+        + JSONStringsVector('short_description_i18n', weight='B')
+        + SearchVector(tag_names, weight='B')
+        + SearchVector('full_description', weight='C')
+        + JSONStringsVector('full_description_i18n', weight='C')
+        + SearchVector('category', weight='D')
+        + JSONStringsVector('category_i18n', weight='D')
+    )
+
+
+def update_search_vector(queryset) -> int:
+    """Recompute the stored ``search_vector`` for every idea in ``queryset``."""
+    return queryset.update(search_vector=build_search_vector())
+
+
+def refresh_idea_search(idea: Idea) -> None:
+    update_search_vector(Idea.objects.filter(pk=idea.pk))
+
+
+def backfill_search_vectors(batch_size: int = 500, only_missing: bool = False) -> int:
+    """Rebuild search vectors in primary-key batches. Returns the number of ideas updated."""
+    base = Idea.objects.all()
+    if only_missing:
+        base = base.filter(search_vector__isnull=True)
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(base.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return updated
+        last_id = ids[-1]
+        updated += update_search_vector(Idea.objects.filter(pk__in=ids))
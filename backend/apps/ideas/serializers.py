@@ -2,7 +2,13 @@ import re
 from django.db import transaction
 from rest_framework import serializers
 from .models import Comment, Idea, PublicComment, Tag
-from apps.accounts.serializers import resolve_avatar_url
+from .caching import IdeaRepresentationCache
+from .i18n import apply_translations
+from .relations import ViewerRelations
+from .search import refresh_idea_search
+from .tags import resolve_tag_ids
+from apps.accounts.serializers import resolve_avatar_url, resolve_avatar_variants
+from crowdbank.images import variant_urls
 
 
 def get_context_language(context) -> str:
@@ -13,6 +19,17 @@ def get_context_language(context) -> str:
     return lang[:2] if len(lang) >= 2 else 'en'
 
 
+class RequestedFieldsMixin:
+    """Drops every field not listed in ``context['fields']`` (set by read views); no entry renders all fields."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
@@ -66,7 +83,28 @@ class TagsField(serializers.ListField):
         return clean_tags
 
 
-class IdeaSerializer(serializers.ModelSerializer):
+class IdeaListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        ideas = list(data.all() if hasattr(data, 'all') else data)
+        fields = self.child.fields
+        relations = ViewerRelations.from_context(self.context)
+        if 'author' in fields:
+            relations.prime('following', {idea.author_id for idea in ideas})
+        if 'user_liked' in fields:
+            relations.prime('liked_idea', {idea.pk for idea in ideas})
+        if 'user_bookmarked' in fields:
+            relations.prime('bookmarked_idea', {idea.pk for idea in ideas})
+        representations = IdeaRepresentationCache.from_context(
+            self.context, get_context_language(self.context), tuple(fields)
+        )
+        representations.prime(ideas)
+        try:
+            return super().to_representation(ideas)
+        finally:
+            representations.flush()
+
+
+class IdeaSerializer(RequestedFieldsMixin, serializers.ModelSerializer):
     title = serializers.CharField(required=True, min_length=1, max_length=120)
     title_i18n = serializers.JSONField(required=False)
     short_description = serializers.CharField(required=True, min_length=1, max_length=280)
@@ -78,15 +116,38 @@ class IdeaSerializer(serializers.ModelSerializer):
     tags = TagsField(required=False)
     image = serializers.ImageField(required=False, allow_null=True)
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     author = serializers.SerializerMethodField()
     comment_count = serializers.IntegerField(read_only=True)
     like_count = serializers.IntegerField(read_only=True)
-    user_liked = serializers.BooleanField(read_only=True)
-    user_bookmarked = serializers.BooleanField(read_only=True)
+    user_liked = serializers.SerializerMethodField()
+    user_bookmarked = serializers.SerializerMethodField()
     views_count = serializers.IntegerField(read_only=True)
 
+    # Filled in on every read; everything else comes from IdeaRepresentationCache.
+    live_fields = ('comment_count', 'like_count', 'views_count')
+    localized_fields = (
+        ('title', 'title_i18n'),
+        ('short_description', 'short_description_i18n'),
+        ('full_description', 'full_description_i18n'),
+        ('category', 'category_i18n'),
+    )
+    # Columns each field reads. Columns no requested field needs are deferred (see ``deferred_columns``);
+    # translations of rendered base fields are resolved in SQL by ``i18n.localize``.
+    field_columns = {
+        'title_i18n': ('title_i18n',),
+        'short_description_i18n': ('short_description_i18n',),
+        'full_description': ('full_description',),
+        'full_description_i18n': ('full_description_i18n',),
+        'category_i18n': ('category_i18n',),
+        'image': ('image',),
+        'image_url': ('image',),
+        'image_variants': ('image_variants',),
+    }
+
     class Meta:
         model = Idea
+        list_serializer_class = IdeaListSerializer
         fields = (
             'id',
             'title',
@@ -100,6 +161,7 @@ class IdeaSerializer(serializers.ModelSerializer):
             'tags',
             'image',
             'image_url',
+            'image_variants',
             'created_at',
             'updated_at',
             'author',
@@ -110,20 +172,29 @@ class IdeaSerializer(serializers.ModelSerializer):
             'views_count',
         )
 
+    @classmethod
+    def deferred_columns(cls, fields) -> list:
+        """Heavy columns that rendering ``fields`` does not read; ``search_vector`` is never rendered."""
+        columns = {column for needed in cls.field_columns.values() for column in needed}
+        needed = {column for field in fields for column in cls.field_columns.get(field, ())}
+        return ['search_vector', *sorted(columns - needed)]
+
     def get_author(self, obj):
         request = self.context.get('request')
-        is_following = False
-        if request and request.user.is_authenticated:
-            from apps.accounts.models import Follow
-
-            is_following = Follow.objects.filter(follower=request.user, following_id=obj.author_id).exists()
         return {
             'id': obj.author_id,
             'username': obj.author.username,
             'avatar_url': resolve_avatar_url(obj.author, request),
-            'is_following': is_following,
+            'avatar_variants': resolve_avatar_variants(obj.author, request),
+            'is_following': ViewerRelations.from_context(self.context).has('following', obj.author_id),
         }
 
+    def get_user_liked(self, obj):
+        return ViewerRelations.from_context(self.context).has('liked_idea', obj.pk)
+
+    def get_user_bookmarked(self, obj):
+        return ViewerRelations.from_context(self.context).has('bookmarked_idea', obj.pk)
+
     def get_image_url(self, obj):
         request = self.context.get('request')
         if obj.image and request:
@@ -132,20 +203,32 @@ class IdeaSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
 
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants, self.context.get('request'))
+
     def to_representation(self, instance):
-        data = super().to_representation(instance)
         lang = get_context_language(self.context)
-        for base, field in (
-            ('title', 'title_i18n'),
-            ('short_description', 'short_description_i18n'),
-            ('full_description', 'full_description_i18n'),
-            ('category', 'category_i18n'),
-        ):
-            translations = data.get(field) or {}
-            if isinstance(translations, dict) and translations.get(lang):
-                data[base] = translations[lang]
+        representations = IdeaRepresentationCache.from_context(self.context, lang, tuple(self.fields))
+        data = representations.get(instance)
+        if data is None:
+            data = self.render(instance, lang)
+            representations.set(instance, data)
+        data = dict(data)
+        relations = ViewerRelations.from_context(self.context)
+        if 'author' in data:
+            data['author'] = dict(data['author'], is_following=relations.has('following', instance.author_id))
+        if 'user_liked' in data:
+            data['user_liked'] = relations.has('liked_idea', instance.pk)
+        if 'user_bookmarked' in data:
+            data['user_bookmarked'] = relations.has('bookmarked_idea', instance.pk)
+        for field in self.live_fields:
+            if field in data:
+                data[field] = getattr(instance, field)
         return data
 
+    def render(self, instance, lang):
+        return apply_translations(super().to_representation(instance), instance, self.localized_fields, lang)
+
     @transaction.atomic
     def create(self, validated_data):
         lang = get_context_language(self.context)
@@ -171,9 +254,8 @@ class IdeaSerializer(serializers.ModelSerializer):
 
         idea = Idea.objects.create(**validated_data)
         if tags:
-            clean_tags = [name.strip() for name in tags if name.strip()]
-            tag_objs = [Tag.objects.get_or_create(name=name)[0] for name in clean_tags]
-            idea.tags.set(tag_objs)
+            idea.tags.set(resolve_tag_ids(tags))
+        refresh_idea_search(idea)
         return idea
 
     @transaction.atomic
@@ -218,29 +300,43 @@ class IdeaSerializer(serializers.ModelSerializer):
         # Only update tags if they were explicitly provided
         if tags != '__NOT_PROVIDED__':
             if tags:  # If tags list is provided and not empty
-                clean_tags = [name.strip() for name in tags if name.strip()]
-                tag_objs = [Tag.objects.get_or_create(name=name)[0] for name in clean_tags]
-                instance.tags.set(tag_objs)
+                instance.tags.set(resolve_tag_ids(tags))
             else:  # If empty list provided, clear all tags
                 instance.tags.clear()
         # If tags == '__NOT_PROVIDED__', don't touch tags at all
 
+        refresh_idea_search(instance)
         return instance
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        comments = list(data.all() if hasattr(data, 'all') else data)
+        comment_ids = set()
+        for comment in comments:
+            comment_ids.add(comment.pk)
+            comment_ids.update(reply.pk for reply in getattr(comment, 'thread_replies', ()))
+        ViewerRelations.from_context(self.context).prime('liked_comment', comment_ids)
+        return super().to_representation(comments)
+
+
+class CommentSerializer(RequestedFieldsMixin, serializers.ModelSerializer):
     author = serializers.SerializerMethodField()
     idea_detail = serializers.SerializerMethodField()
     body = serializers.CharField(required=False, allow_blank=True, max_length=1000)
     body_i18n = serializers.JSONField(required=False)
     image = serializers.FileField(required=False, allow_null=True)
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     like_count = serializers.IntegerField(read_only=True)
-    user_liked = serializers.BooleanField(read_only=True)
+    user_liked = serializers.SerializerMethodField()
     is_pinned = serializers.BooleanField(read_only=True)
 
+    localized_fields = (('body', 'body_i18n'),)
+
     class Meta:
         model = Comment
+        list_serializer_class = CommentListSerializer
         fields = (
             'id',
             'idea',
@@ -251,6 +347,7 @@ class CommentSerializer(serializers.ModelSerializer):
             'body_i18n',
             'image',
             'image_url',
+            'image_variants',
             'is_pinned',
             'created_at',
             'like_count',
@@ -263,14 +360,22 @@ class CommentSerializer(serializers.ModelSerializer):
             'id': obj.author_id,
             'username': obj.author.username,
             'avatar_url': resolve_avatar_url(obj.author, self.context.get('request')),
+            'avatar_variants': resolve_avatar_variants(obj.author, self.context.get('request')),
         }
 
+    def get_user_liked(self, obj):
+        return ViewerRelations.from_context(self.context).has('liked_comment', obj.pk)
+
     def get_idea_detail(self, obj):
-        lang = get_context_language(self.context)
-        title = obj.idea.title_i18n.get(lang) if isinstance(obj.idea.title_i18n, dict) else None
+        # Read views annotate the localized title instead of loading the whole idea row.
+        title = getattr(obj, 'idea_title_localized', None)
+        if title is None:
+            lang = get_context_language(self.context)
+            title = obj.idea.title_i18n.get(lang) if isinstance(obj.idea.title_i18n, dict) else None
+            title = title or obj.idea.title
         return {
             'id': obj.idea_id,
-            'title': title or obj.idea.title,
+            'title': title,
         }
 
     def get_image_url(self, obj):
@@ -281,6 +386,9 @@ class CommentSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
 
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants, self.context.get('request'))
+
     def validate_parent(self, parent):
         if parent and parent.parent_id:
             raise serializers.ValidationError('Only one level of replies is allowed.')
@@ -321,17 +429,28 @@ class CommentSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        lang = get_context_language(self.context)
-        translations = data.get('body_i18n') or {}
-        if isinstance(translations, dict) and translations.get(lang):
-            data['body'] = translations[lang]
-        return data
+        return apply_translations(data, instance, self.localized_fields, get_context_language(self.context))
 
 
-class PublicCommentSerializer(serializers.ModelSerializer):
+class CommentThreadSerializer(CommentSerializer):
+    """A top-level comment with the replies the thread view attached to it."""
+    reply_count = serializers.IntegerField(read_only=True)
+    replies = serializers.SerializerMethodField()
+    replies_next = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ('reply_count', 'replies', 'replies_next')
+
+    def get_replies(self, obj):
+        return CommentSerializer(obj.thread_replies, many=True, context=self.context).data
+
+
+class PublicCommentSerializer(RequestedFieldsMixin, serializers.ModelSerializer):
     author = serializers.SerializerMethodField()
     body_i18n = serializers.JSONField(required=False)
 
+    localized_fields = (('body', 'body_i18n'),)
+
     class Meta:
         model = PublicComment
         fields = ('id', 'author', 'body', 'body_i18n', 'created_at')
@@ -345,11 +464,7 @@ class PublicCommentSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        lang = get_context_language(self.context)
-        translations = data.get('body_i18n') or {}
-        if isinstance(translations, dict) and translations.get(lang):
-            data['body'] = translations[lang]
-        return data
+        return apply_translations(data, instance, self.localized_fields, get_context_language(self.context))
 
     def create(self, validated_data):
         lang = get_context_language(self.context)
@@ -0,0 +1,76 @@
+"""
+Tag name resolution for idea writes.
+
+Unknown names are inserted with a single ``INSERT ... ON CONFLICT DO NOTHING``
+and read back with one ``IN`` lookup. Resolved ids are remembered in a small
+per-process LRU so popular tags cost no query at all. Each entry records the
+shared ``tags`` version stamp (``crowdbank.versions``) it was read under;
+``forget_tags`` bumps the stamp, so a tag renamed or deleted in the admin is
+dropped from every process's LRU on its next lookup, not only the admin's.
+Entries also expire after ``TAG_CACHE_TTL``.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import transaction
+
+from crowdbank import versions
+from .models import Tag
+
+TAG_CACHE_SIZE = 2048
+TAG_CACHE_TTL = 600
+TAGS_SCOPE = 'tags'
+
+_lock = threading.Lock()
+# name -> (tag id, expiry, version stamp)
+_tag_ids: 'OrderedDict[str, tuple[int, float, int]]' = OrderedDict()
+
+
+def _cached(names, stamp: int) -> dict:
+    now = time.monotonic()
+    found = {}
+    with _lock:
+        for name in names:
+            entry = _tag_ids.get(name)
+            if entry is None:
+                continue
+            if entry[1] < now or entry[2] != stamp:
+                del _tag_ids[name]
+                continue
+            _tag_ids.move_to_end(name)
+            found[name] = entry[0]
+    return found
+
+
+def _remember(ids: dict, stamp: int) -> None:
+    expires = time.monotonic() + TAG_CACHE_TTL
+    with _lock:
+        for name, tag_id in ids.items():
+            _tag_ids[name] = (tag_id, expires, stamp)
+            _tag_ids.move_to_end(name)
+        while len(_tag_ids) > TAG_CACHE_SIZE:
+            _tag_ids.popitem(last=False)
+
+
+def forget_tags() -> None:
+    """Invalidate remembered tag ids in every process; call it after tags change outside ``resolve_tag_ids``."""
+    versions.bump(TAGS_SCOPE)
+    with _lock:
+        _tag_ids.clear()
+
+
+def resolve_tag_ids(names) -> list:
+    """Return tag ids for ``names`` in order, creating the missing tags. Duplicates are dropped."""
+    names = list(dict.fromkeys(name.strip() for name in names if name.strip()))
+    # Read before the lookup, so ids fetched across a concurrent bump are remembered as stale.
+    stamp = versions.current([TAGS_SCOPE])[0]
+    ids = _cached(names, stamp)
+    missing = [name for name in names if name not in ids]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        created = dict(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+        # Only cache ids once the rows are committed; a rolled-back insert must not be remembered.
+        transaction.on_commit(lambda: _remember(created, stamp))
+        ids.update(created)
+    return [ids[name] for name in names if name in ids]
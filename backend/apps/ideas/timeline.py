@@ -0,0 +1,193 @@
+"""
+Fan-out-on-write timelines for the following feed.
+
+Each user's timeline is a Redis sorted set of idea ids scored by creation time
+and capped at ``TIMELINE_LENGTH`` entries. It is built from the database the
+first time it is read, then kept current by pushing new ideas to every
+follower's timeline and by backfilling/pruning an author's ideas when a follow
+is toggled. Timelines of users who stop reading expire after ``TIMELINE_TTL``;
+pushes skip timelines that are not built, so a timeline is always complete.
+
+Publishing and deleting only queue the idea after commit; ``fan_out_timelines``
+drains both queues every minute and pushes or removes each idea on the author's
+followers' timelines in batches of ``FANOUT_BATCH_SIZE``, so a popular author
+does not slow down the create or delete request. Until then a deleted idea is
+skipped when the timeline is read.
+"""
+from django.db import transaction
+
+from apps.accounts.models import Follow
+from crowdbank.redis_client import get_redis
+from .models import Idea
+from .pagination import RankedIdeas
+
+TIMELINE_LENGTH = 500
+TIMELINE_TTL = 60 * 60 * 24 * 7
+FANOUT_BATCH_SIZE = 1000
+
+FANOUT_KEY = 'ideas:timeline:fanout'
+# Members are "<idea id>:<author id>"; the idea row is gone by the time they are drained.
+REMOVALS_KEY = 'ideas:timeline:removals'
+
+# KEYS[1] timeline, KEYS[2] built marker; ARGV: length, (score, member)...
+_PUSH_SCRIPT = """
+if redis.call('exists', KEYS[2]) == 0 then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call('zadd', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('zremrangebyrank', KEYS[1], 0, -tonumber(ARGV[1]) - 1)
+redis.call('expire', KEYS[1], redis.call('ttl', KEYS[2]))
+return 1
+"""
+
+
+def _key(user_id: int) -> str:
+    return f'ideas:timeline:{user_id}'
+
+
+def _built_key(user_id: int) -> str:
+    return f'ideas:timeline:{user_id}:built'
+
+
+def _entries(ideas) -> list:
+    args = []
+    for idea_id, created_at in ideas:
+        args.extend((created_at.timestamp(), idea_id))
+    return args
+
+
+def _push(client, user_ids, entries) -> None:
+    if not entries:
+        return
+    script = client.register_script(_PUSH_SCRIPT)
+    pipe = client.pipeline(transaction=False)
+    for user_id in user_ids:
+        script(keys=[_key(user_id), _built_key(user_id)], args=[TIMELINE_LENGTH, *entries], client=pipe)
+    pipe.execute()
+
+
+def _build(client, user_id: int) -> None:
+    ideas = (
+        Idea.objects.filter(author__followers__follower_id=user_id)
+        .order_by('-created_at')
+        .values_list('pk', 'created_at')[:TIMELINE_LENGTH]
+    )
+    pipe = client.pipeline()
+    pipe.delete(_key(user_id))
+    mapping = {idea_id: created_at.timestamp() for idea_id, created_at in ideas}
+    if mapping:
+        pipe.zadd(_key(user_id), mapping)
+        pipe.expire(_key(user_id), TIMELINE_TTL)
+    pipe.set(_built_key(user_id), 1, ex=TIMELINE_TTL)
+    pipe.execute()
+
+
+def idea_published(idea: Idea) -> None:
+    """Queue ``idea`` for fan-out to its author's followers after the current transaction commits."""
+    client = get_redis()
+    if client is None:
+        return
+    transaction.on_commit(lambda: client.sadd(FANOUT_KEY, idea.pk))
+
+
+def _follower_batches(author_id: int):
+    follower_ids = Follow.objects.filter(following_id=author_id).values_list('follower_id', flat=True)
+    batch = []
+    for follower_id in follower_ids.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(follower_id)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _fan_out(client, idea_id: int, author_id: int, created_at) -> None:
+    entries = _entries([(idea_id, created_at)])
+    for batch in _follower_batches(author_id):
+        _push(client, batch, entries)
+
+
+def _remove(client, idea_id: int, author_id: int) -> None:
+    for batch in _follower_batches(author_id):
+        pipe = client.pipeline(transaction=False)
+        for follower_id in batch:
+            pipe.zrem(_key(follower_id), idea_id)
+        pipe.execute()
+
+
+def fan_out_queued(batch_size: int = 100) -> int:
+    """Drain the publish and removal queues. Returns the number of ideas pushed to or removed from timelines."""
+    client = get_redis()
+    if client is None:
+        return 0
+    handled = 0
+    while True:
+        idea_ids = [int(idea_id) for idea_id in client.spop(FANOUT_KEY, batch_size) or ()]
+        if not idea_ids:
+            break
+        # Ideas deleted while queued are skipped.
+        for idea_id, author_id, created_at in Idea.objects.filter(pk__in=idea_ids).values_list(
+            'pk', 'author_id', 'created_at'
+        ):
+            _fan_out(client, idea_id, author_id, created_at)
+            handled += 1
+    while True:
+        members = client.spop(REMOVALS_KEY, batch_size)
+        if not members:
+            return handled
+        for member in members:
+            member = member.decode() if isinstance(member, bytes) else member
+            idea_id, author_id = map(int, member.split(':'))
+            _remove(client, idea_id, author_id)
+            handled += 1
+
+
+def idea_removed(idea_id: int, author_id: int) -> None:
+    """Queue ``idea_id`` for removal from its author's followers' timelines after the current transaction commits."""
+    client = get_redis()
+    if client is None:
+        return
+    transaction.on_commit(lambda: client.sadd(REMOVALS_KEY, f'{idea_id}:{author_id}'))
+
+
+def follow_added(follower_id: int, author_id: int) -> None:
+    client = get_redis()
+    if client is None:
+        return
+    ideas = (
+        Idea.objects.filter(author_id=author_id)
+        .order_by('-created_at')
+        .values_list('pk', 'created_at')[:TIMELINE_LENGTH]
+    )
+    _push(client, [follower_id], _entries(ideas))
+
+
+def follow_removed(follower_id: int, author_id: int) -> None:
+    client = get_redis()
+    if client is None:
+        return
+    idea_ids = list(
+        Idea.objects.filter(author_id=author_id)
+        .order_by('-created_at')
+        .values_list('pk', flat=True)[:TIMELINE_LENGTH]
+    )
+    if idea_ids:
+        client.zrem(_key(follower_id), *idea_ids)
+
+
+def get_timeline(user, queryset):
+    """Return the user's timeline as ``RankedIdeas``, or ``None`` when Redis is not configured."""
+    client = get_redis()
+    if client is None:
+        return None
+    if not client.exists(_built_key(user.id)):
+        _build(client, user.id)
+    else:
+        pipe = client.pipeline(transaction=False)
+        pipe.expire(_key(user.id), TIMELINE_TTL)
+        pipe.expire(_built_key(user.id), TIMELINE_TTL)
+        pipe.execute()
+    return RankedIdeas(client, _key(user.id), queryset)
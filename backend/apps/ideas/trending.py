@@ -0,0 +1,230 @@
+"""
+Time-decayed trending index kept in Redis sorted sets.
+
+Every supported window (``?days=``) has its own sorted set of idea ids. A like
+adds ``2 ** ((liked_at - epoch) / half_life)`` to the idea's score, so recent
+likes weigh more than old ones, and a new idea is seeded with a small fraction
+of that weight so fresh ideas without likes still rank by age. Scores are
+relative to an epoch that ``rebuild_trending`` resets from the database on a
+schedule. A second sorted set per window holds each idea's creation time, so
+ideas that have aged out of the window are pruned when it is read and never
+count towards its size. While a window is rebuilt, likes and unlikes are also
+appended to a replay list and applied again once the rebuilt set is in place,
+so changes that missed the rebuild's query are not lost.
+"""
+from datetime import timedelta
+
+from django.db.models import ExpressionWrapper, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce, Extract, Power
+from django.utils import timezone
+
+from crowdbank.redis_client import get_redis
+from .models import Idea
+from .pagination import RankedIdeas
+
+TRENDING_WINDOWS = (1, 7, 30)
+CREATION_WEIGHT = 0.01
+# Bounds how long a crashed rebuild keeps changes queued for replay.
+REBUILD_TIMEOUT = 60 * 60
+
+# KEYS[1] window, KEYS[2] creation times, KEYS[3] epoch, KEYS[4] rebuilding, KEYS[5] replay list;
+# ARGV: idea id, created at, event at, factor, half-life
+_APPLY_SCRIPT = """
+local epoch = redis.call('get', KEYS[3])
+if epoch then
+    redis.call('zincrby', KEYS[1], ARGV[4] * 2 ^ ((ARGV[3] - epoch) / ARGV[5]), ARGV[1])
+    redis.call('zadd', KEYS[2], 'NX', ARGV[2], ARGV[1])
+end
+if redis.call('exists', KEYS[4]) == 1 then
+    redis.call('rpush', KEYS[5], ARGV[1], ARGV[2], ARGV[3], ARGV[4])
+end
+return 1
+"""
+
+# KEYS[1] window, KEYS[2] creation times; ARGV[1] oldest creation time kept
+_PRUNE_SCRIPT = """
+local expired = redis.call('zrangebyscore', KEYS[2], '-inf', '(' .. ARGV[1])
+for i = 1, #expired, 1000 do
+    local last = math.min(i + 999, #expired)
+    redis.call('zrem', KEYS[1], unpack(expired, i, last))
+    redis.call('zrem', KEYS[2], unpack(expired, i, last))
+end
+return #expired
+"""
+
+
+def _key(days: int) -> str:
+    return f'ideas:trending:{days}'
+
+
+def _created_key(days: int) -> str:
+    return f'ideas:trending:{days}:created'
+
+
+def _epoch_key(days: int) -> str:
+    return f'ideas:trending:{days}:epoch'
+
+
+def _rebuilding_key(days: int) -> str:
+    return f'ideas:trending:{days}:rebuilding'
+
+
+def _replay_key(days: int) -> str:
+    return f'ideas:trending:{days}:replay'
+
+
+def _apply_keys(days: int) -> list:
+    return [_key(days), _created_key(days), _epoch_key(days), _rebuilding_key(days), _replay_key(days)]
+
+
+def _half_life(days: int) -> float:
+    return days * 86400 / 2
+
+
+def _weight(at, epoch: float, days: int) -> float:
+    return 2 ** ((at.timestamp() - epoch) / _half_life(days))
+
+
+def _decayed(field: str, epoch: float, days: int):
+    """SQL counterpart of ``_weight`` for a datetime column."""
+    exponent = ExpressionWrapper(
+        (Extract(field, 'epoch') - Value(epoch)) / Value(_half_life(days)),
+        output_field=FloatField(),
+    )
+    return Power(Value(2.0), exponent)
+
+
+def _adjust(idea: Idea, at, factor: float) -> None:
+    client = get_redis()
+    if client is None:
+        return
+    now = timezone.now()
+    windows = [
+        days for days in TRENDING_WINDOWS
+        if idea.created_at >= now - timedelta(days=days) and at >= now - timedelta(days=days)
+    ]
+    if not windows:
+        return
+    # The weight is computed in Redis against the epoch current at that moment.
+    apply = client.register_script(_APPLY_SCRIPT)
+    pipe = client.pipeline(transaction=False)
+    for days in windows:
+        args = [idea.pk, idea.created_at.timestamp(), at.timestamp(), factor, _half_life(days)]
+        apply(keys=_apply_keys(days), args=args, client=pipe)
+    pipe.execute()
+
+
+def idea_created(idea: Idea) -> None:
+    _adjust(idea, idea.created_at, CREATION_WEIGHT)
+
+
+def idea_deleted(idea_id: int) -> None:
+    client = get_redis()
+    if client is None:
+        return
+    pipe = client.pipeline(transaction=False)
+    for days in TRENDING_WINDOWS:
+        pipe.zrem(_key(days), idea_id)
+        pipe.zrem(_created_key(days), idea_id)
+    pipe.execute()
+
+
+def like_added(idea: Idea, liked_at) -> None:
+    _adjust(idea, liked_at, 1)
+
+
+def like_removed(idea: Idea, liked_at) -> None:
+    _adjust(idea, liked_at, -1)
+
+
+def _replay(client, days: int) -> None:
+    """Apply the changes recorded while ``days`` was rebuilt to the set that replaced the live one."""
+    entries = client.lrange(_replay_key(days), 0, -1)
+    apply = client.register_script(_APPLY_SCRIPT)
+    pipe = client.pipeline()
+    for start in range(0, len(entries), 4):
+        apply(keys=_apply_keys(days), args=entries[start:start + 4] + [_half_life(days)], client=pipe)
+    pipe.delete(_replay_key(days))
+    pipe.execute()
+
+
+def rebuild_trending(windows=TRENDING_WINDOWS, batch_size: int = 1000) -> dict:
+    """
+    Recompute every window from the database and swap it in atomically. Returns sizes per window.
+
+    Likes and unlikes are recorded from the moment a window's rebuild starts
+    and replayed against the new epoch after the swap, so only a change
+    committed in the instant before its query runs can be counted twice
+    (until the next rebuild).
+    """
+    client = get_redis()
+    if client is None:
+        return {}
+    sizes = {}
+    for days in windows:
+        pipe = client.pipeline()
+        pipe.delete(_replay_key(days))
+        pipe.set(_rebuilding_key(days), 1, ex=REBUILD_TIMEOUT)
+        pipe.execute()
+        now = timezone.now()
+        epoch = now.timestamp()
+        since = now - timedelta(days=days)
+        scores = (
+            Idea.objects.filter(created_at__gte=since)
+            .annotate(
+                score=ExpressionWrapper(
+                    Coalesce(
+                        Sum(
+                            _decayed('likes__created_at', epoch, days),
+                            filter=Q(likes__created_at__gte=since),
+                            output_field=FloatField(),
+                        ),
+                        Value(0.0),
+                    )
+                    + Value(CREATION_WEIGHT) * _decayed('created_at', epoch, days),
+                    output_field=FloatField(),
+                )
+            )
+            .values_list('pk', 'score', 'created_at')
+        )
+        staging_key = f'{_key(days)}:staging'
+        created_staging_key = f'{_created_key(days)}:staging'
+        client.delete(staging_key, created_staging_key)
+        batch = {}
+        created = {}
+        for idea_id, score, created_at in scores.iterator(chunk_size=batch_size):
+            batch[idea_id] = score
+            created[idea_id] = created_at.timestamp()
+            if len(batch) >= batch_size:
+                client.zadd(staging_key, batch)
+                client.zadd(created_staging_key, created)
+                batch = {}
+                created = {}
+        if batch:
+            client.zadd(staging_key, batch)
+            client.zadd(created_staging_key, created)
+        pipe = client.pipeline()
+        if client.exists(staging_key):
+            pipe.rename(staging_key, _key(days))
+            pipe.rename(created_staging_key, _created_key(days))
+        else:
+            pipe.delete(_key(days), _created_key(days))
+        pipe.set(_epoch_key(days), epoch)
+        # Changes applied from here on go to the new set directly, so the replay list is complete.
+        pipe.delete(_rebuilding_key(days))
+        pipe.execute()
+        _replay(client, days)
+        sizes[days] = client.zcard(_key(days))
+    return sizes
+
+
+def get_ranked_ideas(days: int, queryset):
+    """Return a ``RankedIdeas`` for ``days`` or ``None`` when the window is not indexed."""
+    if days not in TRENDING_WINDOWS:
+        return None
+    client = get_redis()
+    if client is None or not client.exists(_epoch_key(days)):
+        return None
+    since = timezone.now() - timedelta(days=days)
+    client.register_script(_PRUNE_SCRIPT)(keys=[_key(days), _created_key(days)], args=[since.timestamp()])
+    return RankedIdeas(client, _key(days), queryset.filter(created_at__gte=since))
@@ -4,7 +4,9 @@ from .views import (
     AdminCommentViewSet,
     AdminIdeaViewSet,
     CommentDeleteView,
+    CommentRepliesView,
     CommentViewSet,
+    IdeaCommentThreadView,
     IdeaCommentsView,
     IdeaViewSet,
     PublicCommentView,
@@ -19,7 +21,9 @@ router.register('admin/comments', AdminCommentViewSet, basename='admin-comment')
 
 urlpatterns = [
     path('ideas/<int:idea_id>/comments', IdeaCommentsView.as_view(), name='idea-comments'),
+    path('ideas/<int:idea_id>/comments/thread', IdeaCommentThreadView.as_view(), name='idea-comment-thread'),
     path('comments/<int:pk>', CommentDeleteView.as_view(), name='comment-delete'),
+    path('comments/<int:pk>/replies', CommentRepliesView.as_view(), name='comment-replies'),
     path('comments/public/', PublicCommentView.as_view(), name='public-comments'),
     path('comments/public/<int:pk>/', PublicCommentDeleteView.as_view(), name='public-comment-delete'),
 ]
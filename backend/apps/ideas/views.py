@@ -1,19 +1,58 @@
 from datetime import timedelta
-from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
-from django.db.models import BooleanField, Count, Exists, F, OuterRef, Q, Value
-from django.db.models.functions import Coalesce
+from functools import partial
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import transaction
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.urls import reverse
 from django.utils import timezone
 from django_filters.rest_framework import FilterSet, CharFilter
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.generics import DestroyAPIView, ListCreateAPIView
+from rest_framework.generics import DestroyAPIView, ListAPIView, ListCreateAPIView
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.parsers import FormParser, MultiPartParser, JSONParser
 
+from apps.accounts.leaderboard import idea_category_changed
+from apps.accounts.stats import bump_stats
 from apps.notifications.models import Notification
+from crowdbank import versions
+from crowdbank.images import schedule_variants
+from crowdbank.versions import SHARED_TTL, conditional_response, shared_response
+from . import timeline, trending
+from .counters import bump_comment_likes, bump_idea_counter, delete_comment, delete_idea, record_idea_view
+from .i18n import localize, localized, without_translations
 from .models import Bookmark, Comment, CommentLike, Idea, IdeaLike, PublicComment
-from .serializers import CommentSerializer, IdeaSerializer, PublicCommentSerializer
+from .pagination import BookmarkPagination, CommentRepliesPagination, CommentThreadPagination, IdeaPagination
+from .related import queue_refresh, related_scope
+from .serializers import (
+    CommentSerializer,
+    CommentThreadSerializer,
+    IdeaSerializer,
+    PublicCommentSerializer,
+    get_context_language,
+)
+
+THREAD_REPLIES = 3
+# Comment reads return ``body`` in the request language only; the JSON translations stay in the database.
+COMMENT_READ_FIELDS = without_translations(CommentSerializer.Meta.fields)
+COMMENT_THREAD_FIELDS = without_translations(CommentThreadSerializer.Meta.fields)
+# What feed cards render (``?view=card``): no full description, translations or image.
+IDEA_CARD_FIELDS = (
+    'id',
+    'title',
+    'short_description',
+    'category',
+    'tags',
+    'created_at',
+    'author',
+    'comment_count',
+    'like_count',
+    'user_liked',
+    'user_bookmarked',
+    'views_count',
+)
 
 
 def get_request_language(request) -> str:
@@ -23,6 +62,19 @@ def get_request_language(request) -> str:
     return raw.strip().lower()
 
 
+def idea_scope(idea_id) -> str:
+    """Version scope of one idea's detail and comments (see ``crowdbank.versions``)."""
+    return versions.scope('idea', idea_id)
+
+
+def localized_comments(queryset, request, fields):
+    """Comments with ``body`` and the idea title resolved to the request language in SQL."""
+    lang = get_context_language({'lang': get_request_language(request)})
+    return localize(queryset.select_related('author'), CommentSerializer.localized_fields, lang, fields).annotate(
+        idea_title_localized=localized('idea__title', 'idea__title_i18n', lang)
+    )
+
+
 class IdeaFilter(FilterSet):
     category = CharFilter(field_name='category', lookup_expr='iexact')
     tag = CharFilter(method='filter_tag')
@@ -46,8 +98,9 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
 class IdeaViewSet(viewsets.ModelViewSet):
     serializer_class = IdeaSerializer
     filterset_class = IdeaFilter
+    pagination_class = IdeaPagination
     parser_classes = [MultiPartParser, FormParser, JSONParser]
-    search_fields = ('title', 'short_description', 'full_description')
+    # ?search= is served by the stored search_vector in get_queryset, not SearchFilter.
     ordering_fields = ('created_at', 'like_count')
     ordering = ('-created_at',)
 
@@ -58,64 +111,106 @@ class IdeaViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated(), IsAuthorOrReadOnly()]
         return [permissions.AllowAny()]
 
+    def get_requested_fields(self):
+        """Field subset from ``?view=card`` or ``?fields=a,b``, or ``None`` for the full representation."""
+        if self.request.method != 'GET':
+            return None
+        if self.request.query_params.get('view') == 'card':
+            return IDEA_CARD_FIELDS
+        raw = self.request.query_params.get('fields')
+        if not raw:
+            return None
+        requested = {name.strip() for name in raw.split(',')}
+        return tuple(name for name in IdeaSerializer.Meta.fields if name in requested or name == 'id')
+
     def get_queryset(self):
-        user = self.request.user if self.request.user.is_authenticated else None
-        queryset = (
-            Idea.objects.select_related('author')
-            .prefetch_related('tags')
-            .annotate(
-                comment_count=Coalesce(Count('comments', distinct=True), 0),
-                like_count=Coalesce(Count('likes', distinct=True), 0),
-            )
-        )
+        requested = self.get_requested_fields()
+        fields = requested or IdeaSerializer.Meta.fields
+        queryset = Idea.objects.select_related('author').defer(*IdeaSerializer.deferred_columns(fields))
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if requested:
+            lang = get_context_language({'lang': get_request_language(self.request)})
+            queryset = localize(queryset, IdeaSerializer.localized_fields, lang, requested)
 
         # Full-text search if search query is provided
         search_query = self.request.query_params.get('search')
         if search_query:
-            search_vector = SearchVector('title', weight='A') + \
-                          SearchVector('short_description', weight='B') + \
-                          SearchVector('full_description', weight='C')
             query = SearchQuery(search_query)
-            queryset = queryset.annotate(
-                rank=SearchRank(search_vector, query)
-            ).filter(rank__gte=0.01).order_by('-rank')
-
-        if user:
-            queryset = queryset.annotate(
-                user_liked=Exists(IdeaLike.objects.filter(idea=OuterRef('pk'), user=user)),
-                user_bookmarked=Exists(Bookmark.objects.filter(idea=OuterRef('pk'), user=user))
-            )
-        else:
-            queryset = queryset.annotate(
-                user_liked=Value(False, output_field=BooleanField()),
-                user_bookmarked=Value(False, output_field=BooleanField())
-            )
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=SearchRank(F('search_vector'), query)
+            ).order_by('-rank')
         return queryset
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['lang'] = get_request_language(self.request)
+        context['fields'] = self.get_requested_fields()
         return context
 
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, ['ideas', 'profiles'], partial(super().list, request, *args, **kwargs), shared_ttl=SHARED_TTL
+        )
+
     def retrieve(self, request, *args, **kwargs):
+        # A revalidation answered with 304 is not counted as a view; a shared cache hit is.
+        return conditional_response(
+            request,
+            [idea_scope(kwargs['pk']), 'profiles'],
+            self.render_idea,
+            shared_ttl=SHARED_TTL,
+            on_hit=partial(record_idea_view, kwargs['pk']),
+        )
+
+    def render_idea(self):
         instance = self.get_object()
-        # Increment view count
-        Idea.objects.filter(pk=instance.pk).update(views_count=F('views_count') + 1)
-        # Refresh from database to get updated view count
-        instance.refresh_from_db()
+        # Show the stored count plus views that are still buffered
+        instance.views_count += record_idea_view(instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            idea = serializer.save(author=self.request.user)
+            bump_stats(idea.author_id, total_ideas=1)
+        versions.bump('ideas', f'user:{idea.author_id}')
+        if 'image' in serializer.validated_data:
+            schedule_variants(idea, 'image', scopes=('ideas', idea_scope(idea.pk)))
+        queue_refresh(idea.pk)
+        trending.idea_created(idea)
+        timeline.idea_published(idea)
+
+    def perform_update(self, serializer):
+        old_category = serializer.instance.category
+        idea = serializer.save()
+        idea_category_changed(idea, old_category)
+        versions.bump('ideas', idea_scope(idea.pk))
+        if 'image' in serializer.validated_data:
+            schedule_variants(idea, 'image', scopes=('ideas', idea_scope(idea.pk)))
+        if 'tags' in serializer.validated_data or 'category' in serializer.validated_data:
+            queue_refresh(idea.pk, neighbours=True)
+
+    def perform_destroy(self, instance):
+        delete_idea(instance)
 
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         idea = self.get_object()
-        like, created = IdeaLike.objects.get_or_create(idea=idea, user=request.user)
+        with transaction.atomic():
+            like, created = IdeaLike.objects.get_or_create(idea=idea, user=request.user)
+            # A concurrent unlike may have removed the row already; only the request that deleted it counts.
+            changed = created or bool(like.delete()[0])
+            if changed:
+                bump_idea_counter(idea.pk, 'like_count', 1 if created else -1)
+                bump_stats(idea.author_id, idea.category, total_likes_received=1 if created else -1)
+                queue_refresh(idea.pk)
+        versions.bump('ideas', idea_scope(idea.pk), f'user:{idea.author_id}', f'viewer:{request.user.id}')
         if not created:
-            like.delete()
+            if changed:
+                trending.like_removed(idea, like.created_at)
             return Response({'detail': 'Like removed.'}, status=status.HTTP_200_OK)
+        trending.like_added(idea, like.created_at)
         if idea.author_id != request.user.id:
             Notification.objects.create(
                 user=idea.author,
@@ -138,9 +233,18 @@ class IdeaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='trending')
     def trending(self, request):
+        # Not conditional: the ranking also moves as ideas age out of the window.
+        return shared_response(request, ['ideas', 'profiles'], partial(self.render_trending, request), SHARED_TTL)
+
+    def render_trending(self, request):
         days = int(request.query_params.get('days', '7'))
         if days < 1:
             days = 7
+        ranked = trending.get_ranked_ideas(days, self.get_queryset())
+        if ranked is not None:
+            page = self.paginate_queryset(ranked)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         since = timezone.now() - timedelta(days=days)
         queryset = (
             self.get_queryset()
@@ -155,9 +259,25 @@ class IdeaViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        scopes = ['ideas', related_scope(pk), 'profiles']
+        return conditional_response(request, scopes, partial(self.render_related, pk), shared_ttl=SHARED_TTL)
+
+    def render_related(self, pk):
+        # One read of the precomputed index; an unknown idea simply has no neighbours.
+        queryset = self.get_queryset().filter(related_to__idea_id=pk).order_by('-related_to__score', '-pk')
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
     @action(detail=False, methods=['get'], url_path='following')
     def following(self, request):
-        queryset = self.get_queryset().filter(author__followers__follower=request.user)
+        ranked = timeline.get_timeline(request.user, self.get_queryset())
+        if ranked is not None:
+            page = self.paginate_queryset(ranked)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        queryset = self.get_queryset().filter(author__followers__follower=request.user).order_by('-created_at')
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -170,6 +290,7 @@ class IdeaViewSet(viewsets.ModelViewSet):
         """Add or remove bookmark for an idea"""
         idea = self.get_object()
         bookmark, created = Bookmark.objects.get_or_create(idea=idea, user=request.user)
+        versions.bump(f'viewer:{request.user.id}')
         if not created:
             bookmark.delete()
             return Response({'detail': 'Bookmark removed.', 'bookmarked': False}, status=status.HTTP_200_OK)
@@ -177,15 +298,15 @@ class IdeaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='bookmarks')
     def my_bookmarks(self, request):
-        """Get list of user's bookmarked ideas"""
-        bookmark_ids = Bookmark.objects.filter(user=request.user).values_list('idea_id', flat=True)
-        queryset = self.get_queryset().filter(id__in=bookmark_ids)
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        """Get list of user's bookmarked ideas, most recently saved first"""
+        paginator = BookmarkPagination()
+        bookmarks = paginator.paginate_queryset(
+            Bookmark.objects.filter(user=request.user).only('id', 'idea_id', 'created_at'), request, view=self
+        )
+        ideas = self.get_queryset().in_bulk([bookmark.idea_id for bookmark in bookmarks])
+        page = [ideas[bookmark.idea_id] for bookmark in bookmarks if bookmark.idea_id in ideas]
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class IdeaCommentsView(ListCreateAPIView):
@@ -199,24 +320,29 @@ class IdeaCommentsView(ListCreateAPIView):
         return [permissions.AllowAny()]
 
     def get_queryset(self):
-        user = self.request.user if self.request.user.is_authenticated else None
-        queryset = Comment.objects.select_related('author').filter(idea_id=self.kwargs['idea_id']).annotate(
-            like_count=Coalesce(Count('likes', distinct=True), 0)
-        )
-        if user:
-            queryset = queryset.annotate(user_liked=Exists(CommentLike.objects.filter(comment=OuterRef('pk'), user=user)))
-        else:
-            queryset = queryset.annotate(user_liked=Value(False, output_field=BooleanField()))
-        return queryset.order_by('-is_pinned', '-created_at')
+        queryset = Comment.objects.filter(idea_id=self.kwargs['idea_id']).order_by('-is_pinned', '-created_at')
+        return localized_comments(queryset, self.request, COMMENT_READ_FIELDS)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['idea_id'] = int(self.kwargs['idea_id'])
         context['lang'] = get_request_language(self.request)
+        if self.request.method == 'GET':
+            context['fields'] = COMMENT_READ_FIELDS
         return context
 
+    def list(self, request, *args, **kwargs):
+        scopes = [idea_scope(kwargs['idea_id']), 'profiles']
+        return conditional_response(request, scopes, partial(super().list, request, *args, **kwargs))
+
     def perform_create(self, serializer):
-        comment = serializer.save(idea_id=self.kwargs['idea_id'], author=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(idea_id=self.kwargs['idea_id'], author=self.request.user)
+            bump_idea_counter(comment.idea_id, 'comment_count', 1)
+            bump_stats(comment.author_id, comment.idea.category, comments_count=1)
+        versions.bump('ideas', idea_scope(comment.idea_id), f'user:{comment.author_id}')
+        if 'image' in serializer.validated_data:
+            schedule_variants(comment, 'image', scopes=(idea_scope(comment.idea_id),))
         if comment.idea.author_id != self.request.user.id:
             Notification.objects.create(
                 user=comment.idea.author,
@@ -227,17 +353,71 @@ class IdeaCommentsView(ListCreateAPIView):
             )
 
 
+class IdeaCommentThreadView(ListAPIView):
+    """
+    Top-level comments of an idea by cursor (pinned first), each with its
+    first ``THREAD_REPLIES`` replies and a ``replies_next`` link to the rest.
+
+    All replies for the page come from one window-function query, so a page
+    costs the same number of queries however large the thread is.
+    """
+    serializer_class = CommentThreadSerializer
+    pagination_class = CommentThreadPagination
+    permission_classes = [permissions.AllowAny]
+
+    def get_queryset(self):
+        queryset = Comment.objects.filter(idea_id=self.kwargs['idea_id'], parent__isnull=True)
+        return localized_comments(queryset, self.request, COMMENT_THREAD_FIELDS)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['lang'] = get_request_language(self.request)
+        context['fields'] = COMMENT_THREAD_FIELDS
+        return context
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        replies = localized_comments(
+            Comment.objects.filter(parent_id__in=[comment.pk for comment in page]), self.request, COMMENT_READ_FIELDS
+        ).annotate(
+            position=Window(RowNumber(), partition_by=[F('parent_id')], order_by=[F('created_at').asc(), F('id').asc()]),
+            siblings=Window(Count('id'), partition_by=[F('parent_id')]),
+        ).filter(position__lte=THREAD_REPLIES).order_by('parent_id', 'position')
+        by_parent = {}
+        for reply in replies:
+            by_parent.setdefault(reply.parent_id, []).append(reply)
+        more = CommentRepliesPagination()
+        for comment in page:
+            comment.thread_replies = by_parent.get(comment.pk, [])
+            comment.reply_count = comment.thread_replies[0].siblings if comment.thread_replies else 0
+            comment.replies_next = None
+            if comment.reply_count > len(comment.thread_replies):
+                url = self.request.build_absolute_uri(reverse('comment-replies', args=[comment.pk]))
+                comment.replies_next = more.link_after(url, comment.thread_replies[-1])
+        return page
+
+
+class CommentRepliesView(ListAPIView):
+    serializer_class = CommentSerializer
+    pagination_class = CommentRepliesPagination
+    permission_classes = [permissions.AllowAny]
+
+    def get_queryset(self):
+        return localized_comments(Comment.objects.filter(parent_id=self.kwargs['pk']), self.request, COMMENT_READ_FIELDS)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['lang'] = get_request_language(self.request)
+        context['fields'] = COMMENT_READ_FIELDS
+        return context
+
+
 class CommentViewSet(viewsets.GenericViewSet):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Comment.objects.select_related('author').annotate(
-            like_count=Coalesce(Count('likes', distinct=True), 0),
-            user_liked=Exists(CommentLike.objects.filter(comment=OuterRef('pk'), user=user))
-        )
-        return queryset
+        return Comment.objects.select_related('author', 'idea')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -247,9 +427,13 @@ class CommentViewSet(viewsets.GenericViewSet):
     @action(detail=True, methods=['post'], url_path='like')
     def like(self, request, pk=None):
         comment = self.get_object()
-        like, created = CommentLike.objects.get_or_create(comment=comment, user=request.user)
+        with transaction.atomic():
+            like, created = CommentLike.objects.get_or_create(comment=comment, user=request.user)
+            # A concurrent unlike may have removed the row already.
+            if created or like.delete()[0]:
+                bump_comment_likes(comment.pk, 1 if created else -1)
+        versions.bump(idea_scope(comment.idea_id), f'viewer:{request.user.id}')
         if not created:
-            like.delete()
             return Response({'detail': 'Like removed.'}, status=status.HTTP_200_OK)
         if comment.author_id != request.user.id:
             Notification.objects.create(
@@ -267,6 +451,7 @@ class CommentViewSet(viewsets.GenericViewSet):
             raise PermissionDenied('Only the idea author can pin comments.')
         comment.is_pinned = not comment.is_pinned
         comment.save(update_fields=['is_pinned'])
+        versions.bump(idea_scope(comment.idea_id))
         return Response({'is_pinned': comment.is_pinned}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['patch'], url_path='edit')
@@ -278,6 +463,9 @@ class CommentViewSet(viewsets.GenericViewSet):
         serializer = self.get_serializer(comment, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        versions.bump(idea_scope(comment.idea_id))
+        if 'image' in serializer.validated_data:
+            schedule_variants(comment, 'image', scopes=(idea_scope(comment.idea_id),))
         return Response(serializer.data)
 
     @action(detail=True, methods=['delete'], url_path='delete')
@@ -285,7 +473,7 @@ class CommentViewSet(viewsets.GenericViewSet):
         comment = self.get_object()
         if comment.author_id != request.user.id:
             raise PermissionDenied('You can only delete your own comments.')
-        comment.delete()
+        delete_comment(comment)
         return Response({'detail': 'Comment deleted.'}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -297,20 +485,26 @@ class AdminIdeaViewSet(viewsets.ModelViewSet):
     ordering = ('-created_at',)
 
     def get_queryset(self):
-        return (
-            Idea.objects.select_related('author')
-            .prefetch_related('tags')
-            .annotate(
-                comment_count=Coalesce(Count('comments', distinct=True), 0),
-                like_count=Coalesce(Count('likes', distinct=True), 0),
-            )
-        )
+        return Idea.objects.select_related('author').prefetch_related('tags')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['lang'] = get_request_language(self.request)
         return context
 
+    def perform_update(self, serializer):
+        old_category = serializer.instance.category
+        idea = serializer.save()
+        idea_category_changed(idea, old_category)
+        versions.bump('ideas', idea_scope(idea.pk))
+        if 'image' in serializer.validated_data:
+            schedule_variants(idea, 'image', scopes=('ideas', idea_scope(idea.pk)))
+        if 'tags' in serializer.validated_data or 'category' in serializer.validated_data:
+            queue_refresh(idea.pk, neighbours=True)
+
+    def perform_destroy(self, instance):
+        delete_idea(instance)
+
 
 class AdminCommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
@@ -320,15 +514,22 @@ class AdminCommentViewSet(viewsets.ModelViewSet):
     ordering = ('-created_at',)
 
     def get_queryset(self):
-        return Comment.objects.select_related('author', 'idea').annotate(
-            like_count=Coalesce(Count('likes', distinct=True), 0)
-        )
+        return Comment.objects.select_related('author', 'idea')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['lang'] = get_request_language(self.request)
         return context
 
+    def perform_update(self, serializer):
+        comment = serializer.save()
+        versions.bump(idea_scope(comment.idea_id))
+        if 'image' in serializer.validated_data:
+            schedule_variants(comment, 'image', scopes=(idea_scope(comment.idea_id),))
+
+    def perform_destroy(self, instance):
+        delete_comment(instance)
+
 
 class CommentDeleteView(DestroyAPIView):
     queryset = Comment.objects.all()
@@ -338,7 +539,7 @@ class CommentDeleteView(DestroyAPIView):
     def perform_destroy(self, instance):
         if instance.author_id != self.request.user.id:
             raise PermissionDenied('You can only delete your own comments.')
-        instance.delete()
+        delete_comment(instance)
 
 
 class PublicCommentView(ListCreateAPIView):
@@ -346,11 +547,19 @@ class PublicCommentView(ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return PublicComment.objects.select_related('author').all()
+        lang = get_context_language({'lang': get_request_language(self.request)})
+        return localize(
+            PublicComment.objects.select_related('author'),
+            PublicCommentSerializer.localized_fields,
+            lang,
+            without_translations(PublicCommentSerializer.Meta.fields),
+        )
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['lang'] = get_request_language(self.request)
+        if self.request.method == 'GET':
+            context['fields'] = without_translations(PublicCommentSerializer.Meta.fields)
         return context
 
     def perform_create(self, serializer):
@@ -1,8 +1,40 @@
+import fakeredis
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from apps.ideas.models import Idea
 
+REDIS_MODULES = (
+    'apps.accounts.graph',
+    'apps.accounts.leaderboard',
+    'apps.accounts.presence',
+    'apps.ideas.counters',
+    'apps.ideas.related',
+    'apps.ideas.timeline',
+    'apps.ideas.trending',
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Version stamps and cached responses must not leak between tests.
+    cache.clear()
+
+
+@pytest.fixture()
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch, redis_server):
+    # Tests run on LocMemCache, where get_redis() is None; this exercises the Redis paths.
+    client = fakeredis.FakeRedis(server=redis_server)
+    for module in REDIS_MODULES:
+        monkeypatch.setattr(f'{module}.get_redis', lambda: client)
+    return client
+
 
 @pytest.fixture()
 def api_client():
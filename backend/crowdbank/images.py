@@ -0,0 +1,126 @@
+"""
+Fixed-size WebP/JPEG derivatives of uploaded images.
+
+``schedule_variants`` runs once the upload's transaction commits and hands the
+work to a small thread pool, so requests never wait for Pillow. Every variant
+is re-encoded from the EXIF-rotated original without its metadata and stored
+beside it (``idea-images/photo.480w.webp``). The stored names go to the
+model's ``*_variants`` JSON column; the given version scopes are bumped and
+cache keys deleted so cached responses pick them up. Until they exist clients
+fall back to the original. Serializers expose them with ``variant_urls`` as a
+``srcset``-style map: ``{"webp": {"160w": url, ...}, "jpeg": {...}}``.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+from crowdbank import versions
+
+VARIANT_WIDTHS = (160, 480, 1080)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+WORKERS = 2
+
+logger = logging.getLogger(__name__)
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='image-variants')
+
+
+def _flatten(image):
+    """RGB copy of ``image`` with any transparency composed onto white (JPEG has no alpha)."""
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _delete(storage, variants) -> None:
+    for names in (variants or {}).values():
+        for name in names.values():
+            storage.delete(name)
+
+
+def generate_variants(storage, name: str) -> dict:
+    """Write the variants of the stored image ``name`` and return their storage names by format and width."""
+    with storage.open(name, 'rb') as source:
+        with Image.open(source) as original:
+            image = _flatten(ImageOps.exif_transpose(original))
+    root = os.path.splitext(name)[0]
+    # Never upscale: an image narrower than a variant gets one at its own width instead.
+    widths = sorted({min(width, image.width) for width in VARIANT_WIDTHS})
+    variants = {fmt: {} for fmt in VARIANT_FORMATS}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt, (pil_format, extension, options) in VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            # No ``exif``/``icc_profile`` is passed, so the variants carry no metadata.
+            resized.save(buffer, pil_format, **options)
+            variant_name = f'{root}.{width}w.{extension}'
+            storage.delete(variant_name)
+            variants[fmt][f'{width}w'] = storage.save(variant_name, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def _regenerate(model, pk, field: str, variants_field: str, name: str, stale: dict, scopes, cache_keys) -> None:
+    storage = model._meta.get_field(field).storage
+    _delete(storage, stale)
+    if not name:
+        return
+    try:
+        variants = generate_variants(storage, name)
+    except Exception:
+        logger.exception('Could not generate variants of %s', name)
+        return
+    # The file may have been replaced while the variants were rendered; those belong to nobody then.
+    if model.objects.filter(pk=pk, **{field: name}).update(**{variants_field: variants}):
+        versions.bump(*scopes)
+        cache.delete_many(cache_keys)
+    else:
+        _delete(storage, variants)
+
+
+def _job(*args) -> None:
+    try:
+        _regenerate(*args)
+    finally:
+        connection.close()
+
+
+def schedule_variants(instance, field: str = 'image', variants_field: str = None, scopes=(), cache_keys=()) -> None:
+    """
+    Regenerate the variants of ``instance.<field>`` in the background after the current transaction commits.
+
+    Call it whenever the file changes, including when it is cleared. The
+    previous variants are dropped right away.
+    """
+    variants_field = variants_field or f'{field}_variants'
+    stale = getattr(instance, variants_field) or {}
+    if stale:
+        setattr(instance, variants_field, {})
+        type(instance).objects.filter(pk=instance.pk).update(**{variants_field: {}})
+    name = getattr(instance, field).name or ''
+    if not name and not stale:
+        return
+    args = (type(instance), instance.pk, field, variants_field, name, stale, tuple(scopes), list(cache_keys))
+    transaction.on_commit(lambda: _executor.submit(_job, *args))
+
+
+def variant_urls(variants, request, storage=default_storage) -> dict:
+    urls = {}
+    for fmt, names in (variants or {}).items():
+        urls[fmt] = {}
+        for width, name in names.items():
+            url = storage.url(name)
+            urls[fmt][width] = request.build_absolute_uri(url) if request else url
+    return urls
@@ -0,0 +1,49 @@
+"""
+Paginator-friendly views over Redis sorted sets of primary keys.
+
+Trending windows, following timelines and reputation leaderboards keep their
+ranking in Redis and their rows in the database. ``RankedSequence`` joins the
+two for Django's ``Paginator``: ``len()`` is a ZCARD and slicing is a
+ZREVRANGE followed by hydrating just those ids from a queryset, so any page
+costs O(log n + page size).
+"""
+
+
+class RankedSequence:
+    """
+    Rows of ``queryset`` in the order of the sorted set ``key``, highest score first.
+
+    Ids that ``queryset`` no longer matches are skipped. Subclasses that need
+    the score set ``with_scores`` and receive it in ``hydrate``.
+    """
+    with_scores = False
+
+    def __init__(self, client, key: str, queryset):
+        self.client = client
+        self.key = key
+        self.queryset = queryset
+
+    def __len__(self):
+        return self.client.zcard(self.key)
+
+    def count(self):
+        return len(self)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else len(self)
+        if stop <= start:
+            return []
+        members = self.client.zrevrange(self.key, start, stop - 1, withscores=self.with_scores)
+        if self.with_scores:
+            scores = {int(member): score for member, score in members}
+        else:
+            scores = dict.fromkeys(int(member) for member in members)
+        rows = self.queryset.filter(pk__in=scores).in_bulk()
+        return [self.hydrate(rows[pk], score) for pk, score in scores.items() if pk in rows]
+
+    def hydrate(self, row, score):
+        """Prepare one row of a page; ``score`` is ``None`` unless ``with_scores`` is set."""
+        return row
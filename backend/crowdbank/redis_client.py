@@ -0,0 +1,14 @@
+from django.core.cache import cache
+
+
+def get_redis():
+    """
+    Return the raw redis-py client behind the default cache.
+
+    Returns ``None`` when the default cache is not Redis (local development
+    and tests use LocMemCache), so callers can fall back to the database.
+    """
+    client = getattr(cache, 'client', None)
+    if client is None or not hasattr(client, 'get_client'):
+        return None
+    return client.get_client(write=True)
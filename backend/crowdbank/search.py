@@ -0,0 +1,31 @@
+"""
+Typo-tolerant name search on pg_trgm indexes.
+
+``trigram_search`` keeps rows whose field contains the term or is
+word-similar to it (pg_trgm ``%>``, so "alicr" finds "alice"), and orders
+prefix matches first, then by trigram word similarity. Callers slice the
+result to the top ``SEARCH_LIMIT``. Both filters compare ``UPPER(field)``,
+the expression Django's ``icontains`` uses, so a single
+``GIN (UPPER(field) gin_trgm_ops)`` index serves them; those indexes and the
+``pg_trgm`` extension are created by the searched apps' migrations.
+"""
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Upper
+
+SEARCH_LIMIT = 20
+
+
+def trigram_search(queryset, field: str, term: str):
+    """``queryset`` filtered to rows matching ``term`` on ``field``, best match first."""
+    term = term.strip()
+    prefix_first = Case(
+        When(**{f'{field}__istartswith': term}, then=Value(0)),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+    return (
+        queryset.alias(search_key=Upper(field))
+        .filter(Q(**{f'{field}__icontains': term}) | Q(search_key__trigram_word_similar=term))
+        .order_by(prefix_first, TrigramWordSimilarity(term, Upper(field)).desc(), field)
+    )
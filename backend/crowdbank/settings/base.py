@@ -19,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -92,6 +93,10 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = os.getenv('DJANGO_MEDIA_URL', '/media/')
 MEDIA_ROOT = BASE_DIR / 'media'
+# Partial chat uploads; must not be inside MEDIA_ROOT, which is served publicly.
+CHAT_UPLOAD_DIR = Path(os.getenv('CHAT_UPLOAD_DIR', BASE_DIR / 'uploads'))
+# nginx ``internal`` location that serves MEDIA_ROOT; when set, chat media is handed off with X-Accel-Redirect.
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', '')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'accounts.User'
@@ -28,6 +28,9 @@ SECURE_HSTS_PRELOAD = True
 MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Chat media bytes are sent by nginx (see the /protected-media/ location in nginx/nginx.conf)
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', '/protected-media/')
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -0,0 +1,128 @@
+"""
+Cache-held version stamps for conditional GET and the shared response cache.
+
+A scope (``ideas``, ``idea:<id>``, ``user:<id>``, ``viewer:<id>``,
+``profiles``) holds the time in nanoseconds of the last write that can change
+the responses built from it. Write paths call ``bump``; read endpoints pass
+their scopes to ``conditional_response``, which answers ``304 Not Modified``
+from the stamps alone and only builds the response when a validator does not
+match.
+
+Anonymous reads can also be served from a response cache shared by every
+client (``shared_response``). Its keys include the stamps, so a write makes
+the old entries unreachable instead of deleting them, and concurrent misses
+for the same key wait for one request to build the response.
+
+Stamps expire after ``VERSION_TTL``; a missing stamp reads as "modified now",
+which bounds how long a change made outside the API (Django admin,
+``QuerySet.update()``) can go unnoticed.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from rest_framework.response import Response
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+VERSION_TTL = 60 * 60
+SHARED_TTL = 30
+# How long concurrent misses wait for the request that is building the entry.
+COALESCE_WAIT = 2.0
+COALESCE_POLL = 0.05
+
+
+def _key(scope: str) -> str:
+    return f'versions:{scope}'
+
+
+def scope(kind: str, pk) -> str:
+    """``kind:pk`` with URL-captured ids normalised, so ``/ideas/01`` and ``/ideas/1`` share a stamp."""
+    pk = str(pk)
+    return f'{kind}:{int(pk)}' if pk.isdigit() else f'{kind}:{pk}'
+
+
+def bump(*scopes: str) -> None:
+    now = time.time_ns()
+    cache.set_many({_key(name): now for name in scopes}, VERSION_TTL)
+
+
+def current(scopes) -> list:
+    keys = [_key(name) for name in scopes]
+    found = cache.get_many(keys)
+    now = time.time_ns()
+    for key in keys:
+        if key not in found:
+            cache.add(key, now, VERSION_TTL)
+            found[key] = cache.get(key, now)
+    return [found[key] for key in keys]
+
+
+def viewer_scopes(request) -> list:
+    user = request.user
+    return [scope('viewer', user.id)] if user.is_authenticated else []
+
+
+def _signature(request, versions, user_id) -> str:
+    parts = [*map(str, versions), str(user_id), request.build_absolute_uri(), request.headers.get('Accept-Language', '')]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def shared_response(request, scopes, respond, ttl: int = SHARED_TTL, on_hit=None, versions=None):
+    """
+    Serve an anonymous GET from the shared response cache, building it with ``respond()`` on a miss.
+
+    Only 200 responses are stored. ``on_hit`` runs when the cache answers, for
+    side effects a cached read must keep (e.g. counting a view).
+    """
+    if request.user.is_authenticated or request.method != 'GET':
+        return respond()
+    if versions is None:
+        versions = current(scopes)
+    key = f'responses:{_signature(request, versions, "")}'
+    data = cache.get(key)
+    if data is None:
+        if cache.add(f'{key}:lock', 1, int(COALESCE_WAIT) + 1):
+            try:
+                response = respond()
+                if response.status_code == 200:
+                    cache.set(key, response.data, ttl)
+                return response
+            finally:
+                cache.delete(f'{key}:lock')
+        deadline = time.monotonic() + COALESCE_WAIT
+        while data is None and time.monotonic() < deadline:
+            time.sleep(COALESCE_POLL)
+            data = cache.get(key)
+        if data is None:
+            return respond()
+    if on_hit is not None:
+        on_hit()
+    return Response(data)
+
+
+def conditional_response(request, scopes, respond, shared_ttl=None, on_hit=None):
+    """
+    Return 304 when the request's ``If-None-Match`` matches ``scopes``.
+
+    Otherwise return ``respond()`` with an ``ETag`` set. The ETag also covers
+    the viewer, the full URL and ``Accept-Language``, since those change the
+    body without any write. No ``Last-Modified`` is sent: at one-second
+    resolution and without the viewer it would answer 304 for changed bodies.
+    With ``shared_ttl`` anonymous requests go through ``shared_response``.
+    """
+    scopes = [*scopes, *viewer_scopes(request)]
+    versions = current(scopes)
+    user_id = request.user.id if request.user.is_authenticated else ''
+    etag = quote_etag(_signature(request, versions, user_id))
+    not_modified = get_conditional_response(request._request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    if shared_ttl is None:
+        response = respond()
+    else:
+        response = shared_response(request, scopes, respond, shared_ttl, on_hit, versions)
+    if response.status_code == 200:
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True, private=bool(user_id))
+    return response
@@ -1,6 +1,9 @@
+from collections import OrderedDict
+
 import pytest
 from django.contrib.auth import get_user_model
 from rest_framework import status
+from rest_framework.test import APIClient
 
 User = get_user_model()
 
@@ -184,3 +187,244 @@ class TestFollow:
         url = f'/api/users/{other_user.id}/follow'
         response = api_client.post(url, format='json')
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_user_stats_track_writes(auth_client, other_auth_client, user, other_user, idea, django_assert_max_num_queries):
+    from apps.accounts.models import UserStats
+    from apps.accounts.stats import reconcile_user_stats
+
+    auth_client.post(f'/api/users/{other_user.id}/follow', format='json')
+    auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+    auth_client.post(f'/api/ideas/{idea.id}/comments', {'body': 'Nice'}, format='json')
+
+    response = auth_client.get(f'/api/users/{other_user.id}')
+    assert response.data['followers_count'] == 1
+    assert response.data['total_ideas'] == 1
+    assert response.data['total_likes_received'] == 1
+    assert response.data['reputation'] == 2
+    assert auth_client.get('/api/auth/me').data['following_count'] == 1
+    assert UserStats.objects.get(user=user).comments_count == 1
+
+    # Profile listings read stored columns instead of aggregating.
+    with django_assert_max_num_queries(3) as captured:
+        auth_client.get('/api/users')
+    assert not any('GROUP BY' in query['sql'] for query in captured.captured_queries)
+
+    other_auth_client.delete(f'/api/ideas/{idea.id}')
+    stats = UserStats.objects.get(user=other_user)
+    assert (stats.total_ideas, stats.total_likes_received) == (0, 0)
+    assert UserStats.objects.get(user=user).comments_count == 0
+
+    UserStats.objects.filter(user=other_user).update(followers_count=7)
+    assert reconcile_user_stats() == 1
+    assert UserStats.objects.get(user=other_user).followers_count == 1
+
+
+@pytest.mark.django_db
+def test_leaderboard_ranks_by_reputation(auth_client, api_client, user, other_user, idea):
+    auth_client.post(f'/api/users/{other_user.id}/follow', format='json')
+    auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+    auth_client.post(f'/api/ideas/{idea.id}/comments', {'body': 'Nice'}, format='json')
+
+    response = api_client.get('/api/users/leaderboard')
+    assert response.status_code == 200
+    assert [(row['rank'], row['username'], row['score']) for row in response.data['results']] == [
+        (1, 'bob', 2),
+        (2, 'alice', 1),
+    ]
+    response = api_client.get('/api/users/leaderboard', {'category': 'General'})
+    assert [(row['username'], row['score']) for row in response.data['results']] == [('alice', 1), ('bob', 1)]
+    assert api_client.get('/api/users/leaderboard', {'category': 'Other'}).data['results'] == []
+
+    response = auth_client.get('/api/users/leaderboard/me')
+    assert response.data == {'category': None, 'rank': 2, 'score': 1}
+    assert auth_client.get('/api/users/leaderboard/me', {'category': 'Other'}).data['rank'] is None
+
+
+@pytest.mark.django_db
+def test_leaderboard_in_redis(
+    auth_client, user, other_user, idea, django_capture_on_commit_callbacks, monkeypatch, fake_redis
+):
+    from apps.accounts import leaderboard
+
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(f'/api/users/{other_user.id}/follow', format='json')
+    # Boards are only written once built.
+    assert not fake_redis.exists('users:leaderboard')
+    assert leaderboard.rebuild_leaderboard() == {'global': 1}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+        auth_client.post(f'/api/ideas/{idea.id}/comments', {'body': 'Nice'}, format='json')
+    assert fake_redis.zscore('users:leaderboard', other_user.id) == 2
+    assert fake_redis.zscore('users:leaderboard', user.id) == 1
+    assert fake_redis.smembers('users:leaderboard:categories') == {b'General'}
+    response = auth_client.get('/api/users/leaderboard', {'category': 'General'})
+    assert {(row['username'], row['score']) for row in response.data['results']} == {('alice', 1), ('bob', 1)}
+
+    # An unlike committed after the rebuild read the database is replayed onto the new boards.
+    board_scores = leaderboard._board_scores
+
+    def unlike_during_rebuild(batch_size):
+        boards = board_scores(batch_size)
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+        return boards
+
+    monkeypatch.setattr(leaderboard, '_board_scores', unlike_during_rebuild)
+    assert leaderboard.rebuild_leaderboard() == {'global': 2, 'General': 2}
+    assert fake_redis.zscore('users:leaderboard', other_user.id) == 1
+    assert fake_redis.zscore('users:leaderboard:category:General', other_user.id) is None
+    assert not fake_redis.exists('users:leaderboard:replay', 'users:leaderboard:rebuilding')
+    assert auth_client.get('/api/users/leaderboard/me').data == {'category': None, 'rank': 2, 'score': 1}
+
+
+@pytest.mark.django_db
+def test_followers_are_cursor_paginated(auth_client, user, other_user, monkeypatch):
+    from apps.accounts.models import Follow
+    from apps.accounts.pagination import FollowPagination
+
+    fans = [
+        User.objects.create_user(username=f'fan{n}', email=f'fan{n}@example.com', password='password123')
+        for n in range(3)
+    ]
+    for fan in fans:
+        Follow.objects.create(follower=fan, following=other_user)
+    Follow.objects.create(follower=fans[0], following=user)
+    auth_client.post(f'/api/users/{fans[1].id}/follow', format='json')
+
+    monkeypatch.setattr(FollowPagination, 'page_size', 2)
+    response = auth_client.get(f'/api/users/{other_user.id}/followers')
+    assert [row['username'] for row in response.data['results']] == ['fan2', 'fan1']
+    assert [row['is_following'] for row in response.data['results']] == [False, True]
+    response = auth_client.get(response.data['next'])
+    assert [row['username'] for row in response.data['results']] == ['fan0']
+    assert response.data['next'] is None
+
+    response = auth_client.get(f'/api/users/{user.id}/following')
+    assert [row['username'] for row in response.data['results']] == ['fan1']
+    # alice follows fan1, who follows bob.
+    assert auth_client.get(f'/api/users/{other_user.id}').data['mutual_followers_count'] == 1
+    assert 'mutual_followers_count' not in auth_client.get(f'/api/users/{user.id}').data
+    assert auth_client.get('/api/users/999999/followers').status_code == 404
+
+
+@pytest.mark.django_db
+def test_follow_graph_in_redis(auth_client, user, other_user, fake_redis):
+    from apps.accounts import graph
+    from apps.accounts.models import Follow
+
+    carol = User.objects.create_user(username='carol', email='carol@example.com', password='password123')
+    Follow.objects.create(follower=carol, following=other_user)
+    auth_client.post(f'/api/users/{carol.id}/follow', format='json')
+    # Writes skip sets nobody has read yet.
+    assert not fake_redis.exists(f'users:following:{user.id}')
+
+    assert graph.mutual_followers_count(user.id, other_user.id) == 1
+    assert fake_redis.smembers(f'users:following:{user.id}') == {str(carol.id).encode()}
+    assert fake_redis.ttl(f'users:following:{user.id}') > 0
+    assert graph.following_among(user.id, [carol.id, other_user.id]) == {carol.id}
+
+    auth_client.post(f'/api/users/{other_user.id}/follow', format='json')
+    assert graph.following_among(user.id, [carol.id, other_user.id]) == {carol.id, other_user.id}
+    assert fake_redis.sismember(f'users:followers:{other_user.id}', user.id)
+    response = auth_client.get(f'/api/users/{other_user.id}/followers')
+    assert {row['username']: row['is_following'] for row in response.data['results']} == {'alice': False, 'carol': True}
+
+    auth_client.post(f'/api/users/{carol.id}/follow', format='json')
+    assert graph.mutual_followers_count(user.id, other_user.id) == 0
+    assert graph.following_among(user.id, [carol.id]) == set()
+
+
+@pytest.mark.django_db
+def test_profile_revalidation_tracks_mutual_followers(auth_client, user, other_user):
+    carol = User.objects.create_user(username='carol', email='carol@example.com', password='password123')
+    carol_client = APIClient()
+    carol_client.force_authenticate(user=carol)
+    url = f'/api/users/{other_user.id}'
+    auth_client.post(f'/api/users/{carol.id}/follow', format='json')
+    response = auth_client.get(url)
+    assert response.data['mutual_followers_count'] == 0
+
+    # carol's follow bumps bob's stamp; alice's unfollow bumps her viewer stamp.
+    carol_client.post(url + '/follow', format='json')
+    response = auth_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 200
+    assert response.data['mutual_followers_count'] == 1
+
+    auth_client.post(f'/api/users/{carol.id}/follow', format='json')
+    response = auth_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 200
+    assert response.data['mutual_followers_count'] == 0
+
+
+@pytest.fixture()
+def trigram(db):
+    from django.db import DatabaseError, connection, transaction
+
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError:
+        pytest.skip('pg_trgm is not available')
+
+
+@pytest.mark.django_db
+def test_user_search_tolerates_typos(api_client, user, other_user, trigram):
+    User.objects.create_user(username='malice', email='malice@example.com', password='password123')
+
+    response = api_client.get('/api/users', {'search': 'alic'})
+    assert [row['username'] for row in response.data['results']] == ['alice', 'malice']
+    response = api_client.get('/api/users/autocomplete', {'q': 'alicr'})
+    assert response.data[0] == {'id': user.id, 'username': 'alice', 'avatar_url': None}
+    assert api_client.get('/api/users/autocomplete').data == []
+
+
+@pytest.mark.django_db
+def test_presence_writes_are_coalesced(auth_client, user, monkeypatch):
+    from apps.accounts import presence
+
+    writes = []
+    write = presence._write
+    monkeypatch.setattr(presence, '_last_write', OrderedDict())
+    monkeypatch.setattr(presence, '_write', lambda user_id, online: writes.append(online) or write(user_id, online))
+
+    auth_client.get('/api/auth/me')
+    auth_client.get('/api/auth/me')
+    assert writes == [True]
+    assert presence.get_presence(user.id)['is_online'] is True
+
+    presence.mark_offline(user.id)
+    presence.mark_online(user.id)
+    assert writes == [True, False, True]
+    monkeypatch.setattr(presence, 'WRITE_INTERVAL', 0)
+    presence.mark_online(user.id)
+    assert writes == [True, False, True, True]
+    # Records older than the interval are pruned.
+    assert not presence._last_write
+
+
+@pytest.mark.django_db
+def test_async_presence_writes_use_redis_pipeline(user, monkeypatch, redis_server, fake_redis):
+    import fakeredis
+    from asgiref.sync import async_to_sync
+    from apps.accounts import presence
+
+    monkeypatch.setattr(presence, '_last_write', OrderedDict())
+    monkeypatch.setattr(presence, '_async_client', lambda: fakeredis.FakeAsyncRedis(server=redis_server))
+
+    async_to_sync(presence.amark_online)(user.id)
+    state = presence.get_presence(user.id)
+    assert state['is_online'] is True
+    assert state['last_seen'] is not None
+    assert 0 < fake_redis.ttl(f'presence:online:{user.id}') <= presence.ONLINE_TTL
+
+    # Reports inside the interval are not written.
+    fake_redis.delete(f'presence:online:{user.id}')
+    async_to_sync(presence.amark_online)(user.id)
+    assert presence.get_presence(user.id)['is_online'] is False
+
+    async_to_sync(presence.amark_offline)(user.id)
+    assert not fake_redis.exists(f'presence:online:{user.id}')
+    assert fake_redis.ttl(f'presence:last_seen:{user.id}') > 0
@@ -0,0 +1,126 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import RequestFactory
+from apps.chat.models import ChatRoom, ChatUpload, Message
+from apps.chat.serializers import MessageSerializer
+
+
+@pytest.fixture()
+def room(user, other_user):
+    room = ChatRoom.objects.create(created_by=user)
+    room.participants.add(user, other_user)
+    return room
+
+
+@pytest.mark.django_db
+def test_resumable_upload_attached_to_message(
+    auth_client, other_auth_client, room, settings, tmp_path, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.CHAT_UPLOAD_DIR = tmp_path / 'uploads'
+    base = f'/api/chat/rooms/{room.id}/uploads/'
+
+    response = auth_client.post(
+        base, {'kind': 'file', 'file_name': 'notes.txt', 'content_type': 'text/plain', 'size': 10}, format='json'
+    )
+    assert response.status_code == 201
+    url = f"{base}{response.data['id']}/"
+
+    def put(data, content_range):
+        return auth_client.put(
+            url, data=data, content_type='application/octet-stream', HTTP_CONTENT_RANGE=content_range
+        )
+
+    assert put(b'0123', 'bytes 0-3/10').data['received'] == 4
+    # A gap is refused; the client resumes from the reported offset.
+    response = put(b'6789', 'bytes 6-9/10')
+    assert response.status_code == 409
+    assert response.data['received'] == 4
+    assert auth_client.post(f'{url}complete/').status_code == 409
+    # Retried chunks may overlap what already arrived.
+    assert put(b'23456789', 'bytes 2-9/10').data['received'] == 10
+    assert other_auth_client.get(url).status_code == 404
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = auth_client.post(f'{url}complete/')
+    assert response.status_code == 200
+    assert response.data['completed_at'] is not None
+    assert not list((tmp_path / 'uploads').iterdir())
+
+    response = auth_client.post(
+        f'/api/chat/rooms/{room.id}/send_message/', {'upload': response.data['id']}, format='json'
+    )
+    assert response.status_code == 201
+    message = Message.objects.get(pk=response.data['id'])
+    assert message.file_name == 'notes.txt'
+    assert message.file_size == 10
+    assert message.file.name.startswith('chat-files/')
+    with message.file.open('rb') as stored:
+        assert stored.read() == b'0123456789'
+    assert not ChatUpload.objects.exists()
+
+
+@pytest.mark.django_db
+def test_message_media_supports_ranges(auth_client, api_client, room, user, settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.MEDIA_ACCEL_REDIRECT = ''
+    message = Message.objects.create(room=room, sender=user, body='', audio=ContentFile(b'0123456789', 'note.m4a'))
+    url = f'/api/chat/messages/{message.id}/audio/'
+
+    response = auth_client.get(url)
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == b'0123456789'
+    assert response['Accept-Ranges'] == 'bytes'
+    etag = response['ETag']
+
+    response = auth_client.get(url, HTTP_RANGE='bytes=2-5')
+    assert response.status_code == 206
+    assert response['Content-Range'] == 'bytes 2-5/10'
+    assert b''.join(response.streaming_content) == b'2345'
+    assert b''.join(auth_client.get(url, HTTP_RANGE='bytes=-3').streaming_content) == b'789'
+    assert auth_client.get(url, HTTP_RANGE='bytes=10-').status_code == 416
+    # A stale If-Range gets the whole file.
+    assert auth_client.get(url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"old"').status_code == 200
+    assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    # Serialized URLs carry a signed token, since media elements cannot send the JWT header.
+    signed = auth_client.get(f'/api/chat/rooms/{room.id}/messages/').data[0]['audio_url']
+    assert signed.startswith(f'http://testserver{url}?token=')
+    assert b''.join(api_client.get(signed).streaming_content) == b'0123456789'
+    assert api_client.get(f'{url}?token=forged').status_code == 401
+    assert api_client.get(signed.replace('/audio/', '/file/')).status_code == 401
+
+    request = RequestFactory().get('/')
+    request.user = user
+    photo = Message.objects.create(room=room, sender=user, body='', image=ContentFile(b'full', 'photo.jpg'))
+    photo.image_variants = {'webp': {'160w': photo.image.storage.save('chat-images/photo.160w.webp', ContentFile(b'small'))}}
+    photo.save(update_fields=['image_variants'])
+    variants = MessageSerializer(photo, context={'request': request}).data['image_variants']
+    assert b''.join(api_client.get(variants['webp']['160w']).streaming_content) == b'small'
+    # Without a user to issue it to, the URL has no token.
+    assert '?' not in MessageSerializer(message).data['audio_url']
+
+    # Tokens expire.
+    with monkeypatch.context() as patch:
+        patch.setattr('apps.chat.media.MEDIA_TOKEN_MAX_AGE', -1)
+        assert api_client.get(signed).status_code == 401
+
+    outsider = get_user_model().objects.create_user(username='carol', email='carol@example.com', password='password123')
+    request.user = outsider
+    outsider_url = MessageSerializer(message, context={'request': request}).data['audio_url']
+    assert api_client.get(outsider_url).status_code == 404
+    api_client.force_authenticate(user=outsider)
+    assert api_client.get(url).status_code == 404
+    assert api_client.get(signed).status_code == 404
+    api_client.force_authenticate(user=None)
+
+    # A token stops working once its user leaves the room.
+    room.participants.remove(user)
+    assert api_client.get(signed).status_code == 404
+    room.participants.add(user)
+
+    settings.MEDIA_ACCEL_REDIRECT = '/protected-media/'
+    response = auth_client.get(url)
+    assert response['X-Accel-Redirect'] == f'/protected-media/{message.audio.name}'
+    assert response.content == b''
@@ -1,7 +1,22 @@
+from datetime import timedelta
+from io import BytesIO
+from types import SimpleNamespace
+
 import pytest
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
 from apps.accounts.models import Follow
-from apps.ideas.models import IdeaLike
+from apps.ideas.models import Comment, CommentLike, Idea, IdeaLike, Tag
+from apps.ideas.pagination import BookmarkPagination
+from apps.ideas.tags import forget_tags, resolve_tag_ids
 from apps.notifications.models import Notification
+from crowdbank import images, versions
 
 
 @pytest.mark.django_db
@@ -17,6 +32,43 @@ def test_like_toggling(auth_client, idea, user):
     assert not IdeaLike.objects.filter(idea=idea, user=user).exists()
 
 
+@pytest.mark.django_db
+def test_concurrent_unlikes_decrement_once(auth_client, idea, user, monkeypatch):
+    like = IdeaLike.objects.create(idea=idea, user=user)
+    Idea.objects.filter(pk=idea.pk).update(like_count=4)
+    get_or_create = IdeaLike.objects.get_or_create
+
+    def lose_race(**kwargs):
+        # Another unlike deletes the row between our read and our delete.
+        found = get_or_create(**kwargs)
+        IdeaLike.objects.filter(pk=like.pk).delete()
+        return found
+
+    monkeypatch.setattr(IdeaLike.objects, 'get_or_create', lose_race)
+    response = auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+    assert response.data['detail'] == 'Like removed.'
+    idea.refresh_from_db()
+    assert idea.like_count == 4
+
+
+@pytest.mark.django_db
+def test_concurrent_comment_unlikes_decrement_once(auth_client, idea, user, monkeypatch):
+    comment = Comment.objects.create(idea=idea, author=user, body='Parent', like_count=4)
+    like = CommentLike.objects.create(comment=comment, user=user)
+    get_or_create = CommentLike.objects.get_or_create
+
+    def lose_race(**kwargs):
+        found = get_or_create(**kwargs)
+        CommentLike.objects.filter(pk=like.pk).delete()
+        return found
+
+    monkeypatch.setattr(CommentLike.objects, 'get_or_create', lose_race)
+    response = auth_client.post(f'/api/comments/{comment.id}/like', format='json')
+    assert response.data['detail'] == 'Like removed.'
+    comment.refresh_from_db()
+    assert comment.like_count == 4
+
+
 @pytest.mark.django_db
 def test_idea_edit_delete_permissions(auth_client, other_auth_client, idea):
     patch_url = f'/api/ideas/{idea.id}'
@@ -78,3 +130,623 @@ def test_follow_toggle_and_notification(auth_client, other_user, user):
     response = auth_client.post(url, format='json')
     assert response.status_code == 200
     assert not Follow.objects.filter(follower=user, following=other_user).exists()
+
+
+@pytest.mark.django_db
+def test_idea_list_cursor_pagination(api_client, other_user):
+    for index in range(12):
+        Idea.objects.create(
+            title=f'Idea {index}',
+            short_description='Short desc',
+            full_description='Full description',
+            category='General',
+            author=other_user,
+        )
+
+    response = api_client.get('/api/ideas', {'cursor': ''})
+    assert response.status_code == 200
+    assert 'count' not in response.data
+    first_page = [item['id'] for item in response.data['results']]
+    assert len(first_page) == 10
+
+    response = api_client.get(response.data['next'])
+    assert response.status_code == 200
+    second_page = [item['id'] for item in response.data['results']]
+    assert len(second_page) == 2
+    assert response.data['next'] is None
+    assert not set(first_page) & set(second_page)
+    assert first_page + second_page == sorted(first_page + second_page, reverse=True)
+
+    # Every idea ties on like_count; the id in the cursor keeps pages apart.
+    response = api_client.get('/api/ideas', {'cursor': '', 'ordering': '-like_count'})
+    tied = [item['id'] for item in response.data['results']]
+    response = api_client.get(response.data['next'])
+    tied += [item['id'] for item in response.data['results']]
+    assert tied == sorted(first_page + second_page, reverse=True)
+
+    assert api_client.get('/api/ideas', {'cursor': 'not-a-cursor'}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_stored_like_and_comment_counters(auth_client, idea):
+    auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+    idea.refresh_from_db()
+    assert idea.like_count == 1
+
+    response = auth_client.post(f'/api/ideas/{idea.id}/comments', {'body': 'Parent'}, format='json')
+    parent_id = response.data['id']
+    auth_client.post(f'/api/ideas/{idea.id}/comments', {'body': 'Reply', 'parent': parent_id}, format='json')
+    idea.refresh_from_db()
+    assert idea.comment_count == 2
+
+    response = auth_client.get(f'/api/ideas/{idea.id}')
+    assert response.data['like_count'] == 1
+    assert response.data['comment_count'] == 2
+
+    response = auth_client.delete(f'/api/comments/{parent_id}')
+    assert response.status_code == 204
+    auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+    idea.refresh_from_db()
+    assert idea.comment_count == 0
+    assert idea.like_count == 0
+
+
+@pytest.mark.django_db
+def test_reconcile_idea_counters_command(idea, user):
+    IdeaLike.objects.create(idea=idea, user=user)
+    Idea.objects.filter(pk=idea.pk).update(like_count=5, comment_count=3)
+
+    call_command('reconcile_idea_counters')
+
+    idea.refresh_from_db()
+    assert idea.like_count == 1
+    assert idea.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_idea_views_buffered_in_redis(api_client, idea, fake_redis):
+    from apps.ideas.counters import FLUSHING_VIEWS_KEY, PENDING_VIEWS_KEY, flush_idea_views, record_idea_view
+
+    Idea.objects.filter(pk=idea.pk).update(views_count=10)
+    assert record_idea_view(idea.pk) == 1
+    assert record_idea_view(idea.pk) == 2
+
+    response = api_client.get(f'/api/ideas/{idea.id}')
+    assert response.data['views_count'] == 13
+    idea.refresh_from_db()
+    assert idea.views_count == 10
+
+    assert flush_idea_views() == 1
+    idea.refresh_from_db()
+    assert idea.views_count == 13
+    assert not fake_redis.exists(PENDING_VIEWS_KEY)
+    assert not fake_redis.exists(FLUSHING_VIEWS_KEY)
+    assert flush_idea_views() == 0
+
+
+@pytest.mark.django_db
+def test_flush_idea_views_resumes_interrupted_run(api_client, idea, fake_redis):
+    from apps.ideas.counters import FLUSHING_VIEWS_KEY, PENDING_VIEWS_KEY, flush_idea_views
+
+    # A previous run renamed the buffer and died; newer views keep buffering.
+    fake_redis.hset(FLUSHING_VIEWS_KEY, idea.pk, 4)
+    fake_redis.hset(PENDING_VIEWS_KEY, idea.pk, 2)
+
+    # Views being flushed are still shown on top of the stored count.
+    assert api_client.get(f'/api/ideas/{idea.id}').data['views_count'] == 7
+
+    assert flush_idea_views() == 1
+    idea.refresh_from_db()
+    assert idea.views_count == 4
+    assert not fake_redis.exists(FLUSHING_VIEWS_KEY)
+    assert int(fake_redis.hget(PENDING_VIEWS_KEY, idea.pk)) == 3
+
+    flush_idea_views()
+    idea.refresh_from_db()
+    assert idea.views_count == 7
+
+
+@pytest.mark.django_db
+def test_flush_idea_views_failed_commit_keeps_hash(idea, fake_redis, monkeypatch):
+    from apps.ideas.counters import FLUSHING_VIEWS_KEY, PENDING_VIEWS_KEY, flush_idea_views
+
+    fake_redis.hset(PENDING_VIEWS_KEY, idea.pk, 5)
+    delete = fake_redis.delete
+
+    def delete_then_fail(*keys):
+        delete(*keys)
+        raise RuntimeError('commit failed')
+
+    # The hash is gone before the commit; a failed transaction puts it back.
+    monkeypatch.setattr(fake_redis, 'delete', delete_then_fail)
+    with pytest.raises(RuntimeError):
+        flush_idea_views()
+    idea.refresh_from_db()
+    assert idea.views_count == 0
+    assert int(fake_redis.hget(FLUSHING_VIEWS_KEY, idea.pk)) == 5
+
+    monkeypatch.setattr(fake_redis, 'delete', delete)
+    assert flush_idea_views() == 1
+    idea.refresh_from_db()
+    assert idea.views_count == 5
+    assert not fake_redis.exists(FLUSHING_VIEWS_KEY)
+
+
+@pytest.mark.django_db
+def test_search_uses_stored_vector(auth_client, api_client):
+    response = auth_client.post('/api/ideas', {
+        'title': 'Solar rooftops',
+        'short_description': 'Cheap panels for schools',
+        'full_description': 'Install panels on every school roof.',
+        'category': 'Energy',
+        'tags': ['greenhouse'],
+        'title_i18n': {'uz': 'Quyosh panellari'},
+    }, format='json')
+    assert response.status_code == 201
+    idea = Idea.objects.get(pk=response.data['id'])
+    assert idea.search_vector
+
+    for term in ('rooftop', 'greenhouse', 'quyosh'):
+        response = api_client.get('/api/ideas', {'search': term})
+        assert [item['id'] for item in response.data['results']] == [idea.id]
+
+    response = api_client.get('/api/ideas', {'search': 'submarine'})
+    assert response.data['results'] == []
+
+
+@pytest.mark.django_db
+def test_backfill_idea_search_command(idea):
+    assert Idea.objects.get(pk=idea.pk).search_vector is None
+
+    call_command('backfill_idea_search', '--missing-only')
+
+    assert Idea.objects.filter(pk=idea.pk, search_vector='test').exists()
+
+
+@pytest.mark.django_db
+def test_trending_orders_by_recent_likes(api_client, idea, other_user, user):
+    newer = Idea.objects.create(
+        title='Newer idea',
+        short_description='Short desc',
+        full_description='Full description',
+        category='General',
+        author=other_user,
+    )
+    IdeaLike.objects.create(idea=idea, user=user)
+
+    response = api_client.get('/api/ideas/trending', {'days': 7})
+    assert response.status_code == 200
+    assert [item['id'] for item in response.data['results']] == [idea.id, newer.id]
+
+
+@pytest.mark.django_db
+def test_trending_index_in_redis(
+    api_client, other_auth_client, idea, other_user, user, django_user_model, monkeypatch, fake_redis,
+):
+    from apps.ideas import trending
+
+    three_days_ago = timezone.now() - timedelta(days=3)
+    older = Idea.objects.create(
+        title='Older idea',
+        short_description='Short desc',
+        full_description='Full description',
+        category='General',
+        author=other_user,
+    )
+    Idea.objects.filter(pk=older.pk).update(created_at=three_days_ago)
+    IdeaLike.objects.filter(pk=IdeaLike.objects.create(idea=older, user=user).pk).update(created_at=three_days_ago)
+    IdeaLike.objects.create(idea=idea, user=user)
+
+    assert trending.rebuild_trending() == {1: 1, 7: 2, 30: 2}
+    assert not fake_redis.exists('ideas:trending:7:staging')
+    # One like each, but the recent one weighs more.
+    response = api_client.get('/api/ideas/trending', {'days': 7})
+    assert [item['id'] for item in response.data['results']] == [idea.id, older.id]
+
+    other_auth_client.post(f'/api/ideas/{older.id}/like', format='json')
+    response = api_client.get('/api/ideas/trending', {'days': 7})
+    assert [item['id'] for item in response.data['results']] == [older.id, idea.id]
+
+    # A like committed after the rebuild has read the database is replayed onto the new set.
+    zadd = fake_redis.zadd
+
+    def like_during_rebuild(key, mapping, *args, **kwargs):
+        if key == 'ideas:trending:7:staging' and not IdeaLike.objects.filter(idea=idea, user=other_user).exists():
+            other_auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+        return zadd(key, mapping, *args, **kwargs)
+
+    monkeypatch.setattr(fake_redis, 'zadd', like_during_rebuild)
+    trending.rebuild_trending(windows=[7])
+    monkeypatch.setattr(fake_redis, 'zadd', zadd)
+    assert not fake_redis.exists('ideas:trending:7:replay')
+    replayed = fake_redis.zscore('ideas:trending:7', idea.id)
+    trending.rebuild_trending(windows=[7])
+    assert replayed == pytest.approx(fake_redis.zscore('ideas:trending:7', idea.id), rel=1e-6)
+
+    # Ideas that age out of a window are pruned on read and leave its count.
+    fake_redis.zadd('ideas:trending:1:created', {idea.id: three_days_ago.timestamp()})
+    response = api_client.get('/api/ideas/trending', {'days': 1})
+    assert response.data['count'] == 0
+    assert fake_redis.zscore('ideas:trending:1', idea.id) is None
+
+    admin = APIClient()
+    admin.force_authenticate(user=django_user_model.objects.create_superuser('root', 'root@example.com', 'password123'))
+    assert admin.delete(f'/api/admin/ideas/{older.id}').status_code == 204
+    assert all(fake_redis.zscore(f'ideas:trending:{days}', older.id) is None for days in trending.TRENDING_WINDOWS)
+    response = api_client.get('/api/ideas/trending', {'days': 7})
+    assert [item['id'] for item in response.data['results']] == [idea.id]
+
+
+@pytest.mark.django_db
+def test_following_feed_tracks_follow_toggle(auth_client, idea, other_user):
+    response = auth_client.get('/api/ideas/following')
+    assert response.data['results'] == []
+
+    auth_client.post(f'/api/users/{other_user.id}/follow', format='json')
+    response = auth_client.get('/api/ideas/following')
+    assert [item['id'] for item in response.data['results']] == [idea.id]
+
+    auth_client.post(f'/api/users/{other_user.id}/follow', format='json')
+    response = auth_client.get('/api/ideas/following')
+    assert response.data['results'] == []
+
+
+@pytest.mark.django_db
+def test_timeline_fan_out_in_redis(
+    auth_client, other_auth_client, idea, other_user, user, django_user_model, django_capture_on_commit_callbacks,
+    monkeypatch, fake_redis,
+):
+    from apps.ideas import timeline
+
+    def feed():
+        return [item['id'] for item in auth_client.get('/api/ideas/following').data['results']]
+
+    def publish(title):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = other_auth_client.post('/api/ideas', {
+                'title': title,
+                'short_description': 'Short desc',
+                'full_description': 'Full description',
+                'category': 'General',
+            }, format='json')
+        return response.data['id']
+
+    carol = django_user_model.objects.create_user(username='carol', email='carol@example.com', password='password123')
+    Follow.objects.create(follower=carol, following=other_user)
+    auth_client.post(f'/api/users/{other_user.id}/follow', format='json')
+    assert feed() == [idea.id]
+    assert fake_redis.exists(f'ideas:timeline:{user.id}:built')
+
+    newer = publish('Newer idea')
+    # Publishing only queues the idea; the command pushes it.
+    assert feed() == [idea.id]
+    call_command('fan_out_timelines')
+    assert feed() == [newer, idea.id]
+    # Timelines nobody has read are not built, so they are skipped.
+    assert not fake_redis.exists(f'ideas:timeline:{carol.id}')
+
+    monkeypatch.setattr(timeline, 'TIMELINE_LENGTH', 2)
+    newest = publish('Newest idea')
+    call_command('fan_out_timelines')
+    assert feed() == [newest, newer]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        other_auth_client.delete(f'/api/ideas/{newest}')
+    # Removal is queued too; the deleted id stays in the set but is not shown.
+    assert fake_redis.zscore(f'ideas:timeline:{user.id}', newest) is not None
+    assert feed() == [newer]
+    call_command('fan_out_timelines')
+    assert fake_redis.zscore(f'ideas:timeline:{user.id}', newest) is None
+
+
+@pytest.mark.django_db
+def test_idea_list_query_count_is_fixed(auth_client, user, django_user_model):
+    def page_queries():
+        with CaptureQueriesContext(connection) as queries:
+            response = auth_client.get('/api/ideas')
+        assert response.status_code == 200
+        return len(queries)
+
+    def add_idea(index):
+        author = django_user_model.objects.create_user(
+            username=f'author{index}', email=f'author{index}@example.com', password='password123'
+        )
+        Follow.objects.create(follower=user, following=author)
+        idea = Idea.objects.create(
+            title=f'Idea {index}',
+            short_description='Short desc',
+            full_description='Full description',
+            category='General',
+            author=author,
+        )
+        IdeaLike.objects.create(idea=idea, user=user)
+
+    add_idea(0)
+    single = page_queries()
+    for index in range(1, 6):
+        add_idea(index)
+    assert page_queries() == single
+
+    response = auth_client.get('/api/ideas')
+    assert all(item['author']['is_following'] for item in response.data['results'])
+    assert all(item['user_liked'] for item in response.data['results'])
+    assert not any(item['user_bookmarked'] for item in response.data['results'])
+
+
+@pytest.mark.django_db
+def test_idea_representation_cache(auth_client, idea, other_user):
+    auth_client.get(f'/api/ideas/{idea.id}')
+    Idea.objects.filter(pk=idea.pk).update(title='Changed behind the cache')
+
+    auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+    response = auth_client.get('/api/ideas')
+    item = response.data['results'][0]
+    assert item['title'] == 'Test Idea'
+    assert item['user_liked'] is True
+    assert item['like_count'] == 1
+
+    other_user.avatar_url = 'https://example.com/avatar.png'
+    other_user.save(update_fields=['avatar_url'])
+    response = auth_client.get(f'/api/ideas/{idea.id}')
+    assert response.data['author']['avatar_url'] == 'https://example.com/avatar.png'
+    assert response.data['title'] == 'Changed behind the cache'
+
+
+@pytest.mark.django_db
+def test_resolve_tag_ids_upserts_and_caches(django_capture_on_commit_callbacks):
+    forget_tags()
+    existing = Tag.objects.create(name='energy')
+    with django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as queries:
+            ids = resolve_tag_ids(['energy', 'solar', ' solar ', 'wind'])
+    assert len(queries) == 2
+    assert ids[0] == existing.id
+    assert [Tag.objects.get(pk=tag_id).name for tag_id in ids] == ['energy', 'solar', 'wind']
+
+    with CaptureQueriesContext(connection) as queries:
+        assert resolve_tag_ids(['wind', 'energy']) == [ids[2], ids[0]]
+    assert len(queries) == 0
+
+    # Another process deletes a tag and bumps the shared stamp; this process's entries go stale.
+    Tag.objects.filter(pk=ids[2]).delete()
+    versions.bump('tags')
+    with django_capture_on_commit_callbacks(execute=True):
+        wind = resolve_tag_ids(['wind'])
+    assert wind != [ids[2]]
+    assert Tag.objects.get(pk=wind[0]).name == 'wind'
+    forget_tags()
+
+
+@pytest.mark.django_db
+def test_comment_thread_pages_with_fixed_queries(api_client, idea, user):
+    def thread_queries(url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url, params)
+        assert response.status_code == 200
+        return response, len(queries)
+
+    first = Comment.objects.create(idea=idea, author=user, body='first')
+    Comment.objects.create(idea=idea, author=user, body='reply', parent=first)
+    _, single = thread_queries(f'/api/ideas/{idea.id}/comments/thread')
+
+    pinned = Comment.objects.create(idea=idea, author=user, body='pinned', is_pinned=True)
+    for index in range(12):
+        parent = Comment.objects.create(idea=idea, author=user, body=f'top {index}')
+        Comment.objects.create(idea=idea, author=user, body=f'only reply {index}', parent=parent)
+    for index in range(5):
+        Comment.objects.create(idea=idea, author=user, body=f'reply {index}', parent=first)
+
+    response, count = thread_queries(f'/api/ideas/{idea.id}/comments/thread')
+    assert count == single
+    results = response.data['results']
+    assert results[0]['id'] == pinned.id
+    assert len(results) == 10
+    assert response.data['next']
+
+    response = api_client.get(response.data['next'])
+    results = response.data['results']
+    assert response.data['next'] is None
+    assert results[-1]['id'] == first.id
+    thread = results[-1]
+    assert thread['reply_count'] == 6
+    assert [reply['body'] for reply in thread['replies']] == ['reply', 'reply 0', 'reply 1']
+
+    response = api_client.get(thread['replies_next'])
+    assert [reply['body'] for reply in response.data['results']] == ['reply 2', 'reply 3', 'reply 4']
+    assert response.data['next'] is None
+
+    assert api_client.get(f'/api/ideas/{idea.id}/comments/thread', {'cursor': 'bogus'}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_comment_like_counter_and_viewer_flag(auth_client, api_client, idea, other_user):
+    comment = Comment.objects.create(idea=idea, author=other_user, body='Nice')
+
+    auth_client.post(f'/api/comments/{comment.id}/like', format='json')
+    comment.refresh_from_db()
+    assert comment.like_count == 1
+    item = auth_client.get(f'/api/ideas/{idea.id}/comments').data[0]
+    assert (item['like_count'], item['user_liked']) == (1, True)
+    item = api_client.get(f'/api/ideas/{idea.id}/comments').data[0]
+    assert (item['like_count'], item['user_liked']) == (1, False)
+
+    auth_client.post(f'/api/comments/{comment.id}/like', format='json')
+    comment.refresh_from_db()
+    assert comment.like_count == 0
+
+    Comment.objects.filter(pk=comment.pk).update(like_count=7)
+    call_command('reconcile_idea_counters')
+    comment.refresh_from_db()
+    assert comment.like_count == 0
+
+
+@pytest.mark.django_db
+def test_bookmarks_listed_in_saved_order(auth_client, idea, other_user, monkeypatch):
+    monkeypatch.setattr(BookmarkPagination, 'page_size', 2)
+    newer = [
+        Idea.objects.create(
+            title=f'Saved {index}',
+            short_description='Short desc',
+            full_description='Full description',
+            category='General',
+            author=other_user,
+        )
+        for index in range(2)
+    ]
+    for target in (newer[1], idea, newer[0]):
+        auth_client.post(f'/api/ideas/{target.id}/bookmark', format='json')
+
+    response = auth_client.get('/api/ideas/bookmarks')
+    assert [item['id'] for item in response.data['results']] == [newer[0].id, idea.id]
+    assert all(item['user_bookmarked'] for item in response.data['results'])
+    response = auth_client.get(response.data['next'])
+    assert [item['id'] for item in response.data['results']] == [newer[1].id]
+    assert response.data['next'] is None
+
+
+@pytest.mark.django_db
+def test_idea_list_sparse_fieldsets(api_client, idea):
+    Idea.objects.filter(pk=idea.pk).update(title_i18n={'uz': 'Sinov'})
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get('/api/ideas', {'view': 'card'})
+    item = response.data['results'][0]
+    assert item['title'] == 'Test Idea'
+    assert 'full_description' not in item and 'title_i18n' not in item and 'image_url' not in item
+    assert item['author']['username'] == idea.author.username
+    assert not any('full_description' in query['sql'] or 'search_vector' in query['sql'] for query in queries)
+
+    response = api_client.get('/api/ideas', {'fields': 'title,bogus'}, HTTP_ACCEPT_LANGUAGE='uz')
+    assert response.data['results'][0] == {'id': idea.id, 'title': 'Sinov'}
+
+    response = api_client.get(f'/api/ideas/{idea.id}', {'fields': 'full_description'})
+    assert response.data == {'id': idea.id, 'full_description': idea.full_description}
+
+
+@pytest.mark.django_db
+def test_translations_resolved_in_sql(api_client, auth_client, idea, user):
+    Idea.objects.filter(pk=idea.pk).update(title_i18n={'uz': 'Sinov', 'ru': 'Testovaya'})
+    Comment.objects.create(idea=idea, author=user, body='Hello', body_i18n={'en': 'Hello', 'uz': 'Salom'})
+
+    response = api_client.get(f'/api/ideas/{idea.id}/comments', HTTP_ACCEPT_LANGUAGE='uz-UZ,uz;q=0.9')
+    item = response.data[0]
+    assert item['body'] == 'Salom'
+    assert item['idea_detail']['title'] == 'Sinov'
+    assert 'body_i18n' not in item
+
+    response = api_client.get(f'/api/ideas/{idea.id}/comments', HTTP_ACCEPT_LANGUAGE='de')
+    assert (response.data[0]['body'], response.data[0]['idea_detail']['title']) == ('Hello', 'Test Idea')
+
+    response = api_client.get('/api/ideas', {'view': 'card'}, HTTP_ACCEPT_LANGUAGE='ru')
+    assert response.data['results'][0]['title'] == 'Testovaya'
+
+
+@pytest.mark.django_db
+def test_conditional_get_for_ideas_and_comments(api_client, auth_client, idea, other_user):
+    for url in ('/api/ideas', f'/api/ideas/{idea.id}', f'/api/ideas/{idea.id}/comments', f'/api/users/{other_user.id}'):
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert 'Last-Modified' not in response
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert len(queries) == 0
+
+        auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+        auth_client.post(f'/api/users/{other_user.id}/follow', format='json')
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    etag = auth_client.get('/api/ideas')['ETag']
+    assert api_client.get('/api/ideas')['ETag'] != etag
+
+    # Admin edits move the idea's stamp like the author's own edits.
+    comment = Comment.objects.create(idea=idea, author=other_user, body='Before')
+    url = f'/api/ideas/{idea.id}/comments'
+    etag = api_client.get(url)['ETag']
+    admin = APIClient()
+    admin.force_authenticate(user=get_user_model().objects.create_superuser('root', 'root@example.com', 'password123'))
+    assert admin.patch(f'/api/admin/comments/{comment.id}', {'body': 'After'}, format='json').status_code == 200
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_anonymous_reads_served_from_shared_cache(api_client, auth_client, idea):
+    for url in ('/api/ideas', f'/api/ideas/{idea.id}', '/api/ideas/trending'):
+        first = api_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = api_client.get(url)
+        assert second.status_code == 200
+        assert second.data == first.data
+        # Without Redis the view of a cached detail is still written straight to views_count.
+        assert all(query['sql'].startswith('UPDATE "ideas_idea" SET "views_count"') for query in queries)
+
+    auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+    assert api_client.get(f'/api/ideas/{idea.id}').data['like_count'] == 1
+    assert api_client.get('/api/ideas').data['results'][0]['like_count'] == 1
+    assert auth_client.get('/api/ideas').data['results'][0]['user_liked'] is True
+
+
+@pytest.mark.django_db
+def test_image_variants_generated_after_upload(
+    api_client, other_auth_client, idea, settings, tmp_path, monkeypatch, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    jobs = []
+    monkeypatch.setattr(images, '_executor', SimpleNamespace(submit=lambda fn, *args: jobs.append(args)))
+    photo = Image.new('RGB', (1600, 1200), 'red')
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees
+    exif[0x010F] = 'Camera'
+    buffer = BytesIO()
+    photo.save(buffer, 'JPEG', exif=exif)
+    upload = SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = other_auth_client.patch(f'/api/ideas/{idea.id}', {'image': upload}, format='multipart')
+    assert response.status_code == 200
+    assert response.data['image_variants'] == {}
+    assert len(jobs) == 1
+
+    images._regenerate(*jobs[0])
+    variants = api_client.get(f'/api/ideas/{idea.id}').data['image_variants']
+    assert set(variants) == {'webp', 'jpeg'}
+    assert set(variants['webp']) == {'160w', '480w', '1080w'}
+    assert variants['jpeg']['480w'].startswith('http://testserver/media/idea-images/')
+
+    idea.refresh_from_db()
+    with Image.open(tmp_path / idea.image_variants['jpeg']['480w']) as variant:
+        # EXIF orientation applied to the pixels, then dropped.
+        assert variant.size == (480, 640)
+        assert not variant.getexif()
+
+
+@pytest.mark.django_db
+def test_related_ideas_index(api_client, auth_client, idea, other_user, user, django_capture_on_commit_callbacks):
+    def make(title, category, *tags):
+        created = Idea.objects.create(
+            title=title, short_description='Short', full_description='Full', category=category, author=other_user
+        )
+        created.tags.set(resolve_tag_ids(tags))
+        return created
+
+    idea.tags.set(resolve_tag_ids(['solar', 'energy']))
+    both_tags = make('Both tags', 'Other', 'solar', 'energy')
+    co_liked = make('Co-liked', 'Other')
+    same_category = make('Same category', 'General')
+    make('Unrelated', 'Other', 'music')
+    IdeaLike.objects.create(idea=co_liked, user=user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        # Without Redis the liked idea is refreshed as soon as the like commits.
+        auth_client.post(f'/api/ideas/{idea.id}/like', format='json')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(f'/api/ideas/{idea.id}/related')
+    assert response.status_code == 200
+    assert [item['id'] for item in response.data] == [both_tags.id, co_liked.id, same_category.id]
+    related_queries = [query['sql'] for query in queries if 'ideas_relatedidea' in query['sql']]
+    assert len(related_queries) == 1
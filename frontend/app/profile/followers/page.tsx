@@ -1,9 +1,10 @@
 "use client";
 
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery } from "@tanstack/react-query";
 import Link from "next/link";
+import { apiPath } from "../../../lib/api";
 import { useAuth } from "../../../lib/auth";
-import type { User } from "../../../lib/types";
+import type { CursorPage, User } from "../../../lib/types";
 import EmptyState from "../../../components/EmptyState";
 import Loading from "../../../components/Loading";
 import { useLanguage } from "../../../lib/i18n";
@@ -12,11 +13,14 @@ export default function FollowersPage() {
   const { user, apiFetch } = useAuth();
   const { t } = useLanguage();
 
-  const followersQuery = useQuery({
+  const followersQuery = useInfiniteQuery({
     queryKey: ["profile-followers", user?.id],
-    queryFn: () => apiFetch<User[]>(`/users/${user?.id}/followers`),
+    queryFn: ({ pageParam }) => apiFetch<CursorPage<User>>(pageParam),
+    initialPageParam: `/users/${user?.id}/followers`,
+    getNextPageParam: (lastPage) => apiPath(lastPage.next),
     enabled: !!user,
   });
+  const users = followersQuery.data?.pages.flatMap((page) => page.results) ?? [];
 
   if (!user) {
     return (
@@ -50,7 +54,7 @@ export default function FollowersPage() {
           description={(followersQuery.error as Error).message}
         />
       )}
-      {followersQuery.data && followersQuery.data.length === 0 && (
+      {followersQuery.data && users.length === 0 && (
         <EmptyState
           title={t("connections.followersEmptyTitle")}
           description={t("connections.followersEmptyBody")}
@@ -58,7 +62,7 @@ export default function FollowersPage() {
       )}
 
       <div className="grid gap-4 md:grid-cols-2">
-        {followersQuery.data?.map((follower) => (
+        {users.map((follower) => (
           <Link
             key={follower.id}
             href={`/users/${follower.id}`}
@@ -82,6 +86,19 @@ export default function FollowersPage() {
           </Link>
         ))}
       </div>
+
+      {followersQuery.hasNextPage && (
+        <div className="flex justify-center">
+          <button
+            type="button"
+            className="btn-secondary"
+            onClick={() => followersQuery.fetchNextPage()}
+            disabled={followersQuery.isFetchingNextPage}
+          >
+            {followersQuery.isFetchingNextPage ? t("common.loading") : t("common.loadMore")}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -1,9 +1,10 @@
 "use client";
 
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery } from "@tanstack/react-query";
 import Link from "next/link";
+import { apiPath } from "../../../lib/api";
 import { useAuth } from "../../../lib/auth";
-import type { User } from "../../../lib/types";
+import type { CursorPage, User } from "../../../lib/types";
 import EmptyState from "../../../components/EmptyState";
 import Loading from "../../../components/Loading";
 import { useLanguage } from "../../../lib/i18n";
@@ -12,11 +13,14 @@ export default function FollowingPage() {
   const { user, apiFetch } = useAuth();
   const { t } = useLanguage();
 
-  const followingQuery = useQuery({
+  const followingQuery = useInfiniteQuery({
     queryKey: ["profile-following", user?.id],
-    queryFn: () => apiFetch<User[]>(`/users/${user?.id}/following`),
+    queryFn: ({ pageParam }) => apiFetch<CursorPage<User>>(pageParam),
+    initialPageParam: `/users/${user?.id}/following`,
+    getNextPageParam: (lastPage) => apiPath(lastPage.next),
     enabled: !!user,
   });
+  const users = followingQuery.data?.pages.flatMap((page) => page.results) ?? [];
 
   if (!user) {
     return (
@@ -50,7 +54,7 @@ export default function FollowingPage() {
           description={(followingQuery.error as Error).message}
         />
       )}
-      {followingQuery.data && followingQuery.data.length === 0 && (
+      {followingQuery.data && users.length === 0 && (
         <EmptyState
           title={t("connections.followingEmptyTitle")}
           description={t("connections.followingEmptyBody")}
@@ -58,7 +62,7 @@ export default function FollowingPage() {
       )}
 
       <div className="grid gap-4 md:grid-cols-2">
-        {followingQuery.data?.map((followedUser) => (
+        {users.map((followedUser) => (
           <Link
             key={followedUser.id}
             href={`/users/${followedUser.id}`}
@@ -82,6 +86,19 @@ export default function FollowingPage() {
           </Link>
         ))}
       </div>
+
+      {followingQuery.hasNextPage && (
+        <div className="flex justify-center">
+          <button
+            type="button"
+            className="btn-secondary"
+            onClick={() => followingQuery.fetchNextPage()}
+            disabled={followingQuery.isFetchingNextPage}
+          >
+            {followingQuery.isFetchingNextPage ? t("common.loading") : t("common.loadMore")}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -119,4 +119,14 @@ export async function authRequest<T>(
   return parseResponse<T>(response);
 }
 
+// Cursor links in paginated responses are absolute URLs; apiFetch takes paths relative to API_URL.
+export function apiPath(url: string | null): string | undefined {
+  if (!url) {
+    return undefined;
+  }
+  const base = new URL(API_URL, "http://localhost").pathname.replace(/\/$/, "");
+  const { pathname, search } = new URL(url, "http://localhost");
+  return `${pathname.startsWith(base) ? pathname.slice(base.length) : pathname}${search}`;
+}
+
 export { API_URL };
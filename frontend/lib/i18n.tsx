@@ -62,6 +62,7 @@ const dictionaries: Record<LanguageCode, Dictionary> = {
     "common.of": "of",
     "common.by": "by",
     "common.loading": "Loading...",
+    "common.loadMore": "Load more",
     "idea.needsFeedback": "Needs feedback",
     "idea.activeDiscussion": "Active discussion",
     "idea.likes": "Likes",
@@ -475,6 +476,7 @@ const dictionaries: Record<LanguageCode, Dictionary> = {
     "common.of": "из",
     "common.by": "от",
     "common.loading": "Загрузка...",
+    "common.loadMore": "Показать ещё",
     "idea.needsFeedback": "Нужен фидбек",
     "idea.activeDiscussion": "Активное обсуждение",
     "idea.likes": "Лайки",
@@ -888,6 +890,7 @@ const dictionaries: Record<LanguageCode, Dictionary> = {
     "common.of": "dan",
     "common.by": "muallif",
     "common.loading": "Yuklanmoqda...",
+    "common.loadMore": "Ko'proq yuklash",
     "idea.needsFeedback": "Fikr kerak",
     "idea.activeDiscussion": "Faol muhokama",
     "idea.likes": "Layklar",
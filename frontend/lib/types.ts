@@ -69,6 +69,11 @@ export type PaginatedResponse<T> = {
   results: T[];
 };
 
+export type CursorPage<T> = {
+  next: string | null;
+  results: T[];
+};
+
 export type ChatMessage = {
   id: number;
   room: number;